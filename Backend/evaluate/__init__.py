@@ -0,0 +1 @@
+from .evaluator import evaluate_listing
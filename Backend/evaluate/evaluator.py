@@ -0,0 +1,233 @@
+# evaluator.py
+
+import time
+import argparse
+import threading
+
+import numpy as np
+import pandas as pd
+from catboost import Pool
+
+# comps: listings with the same key and SQUARE_FEET within +/- SQFT_TOLERANCE
+COMP_KEY_COLUMNS = ["ZIP_CODE", "PROP_TYPE", "NO_BEDROOMS", "TOTAL_BATHS"]
+MARKET_KEY_COLUMNS = ["ZIP_CODE", "PROP_TYPE"]
+TARGET_COLUMN = "LIST_PRICE"
+SQFT_TOLERANCE = 0.2
+
+# asking rent more than this fraction above/below the predicted rent is flagged
+PRICING_TOLERANCE = 0.1
+
+
+# -------------------
+# Input normalization
+# -------------------
+def normalize_columns(df):
+    df.columns = df.columns.str.strip().str.upper().str.replace(" ", "_")
+    return df
+
+
+def _keys(df, columns):
+    # hashable keys that match across dtypes: ZIP_CODE "02134" == 2134, beds 2 == 2.0, PROP_TYPE " rn" == "RN"
+    parts = []
+    for col in columns:
+        if col == "PROP_TYPE":
+            parts.append(df[col].astype(str).str.strip().str.upper())
+        else:
+            parts.append(pd.to_numeric(df[col], errors="coerce").astype(float))
+    return list(zip(*parts))
+
+
+def _group(keys):
+    # key -> positions
+    groups = {}
+    for position, key in enumerate(keys):
+        groups.setdefault(key, []).append(position)
+    return {key: np.array(positions) for key, positions in groups.items()}
+
+
+# -------------------
+# Model features
+# -------------------
+def build_features(listings, model):
+    """
+    Builds the model input from raw listings: the model's own feature names and categorical
+    features (model.feature_names_, model.get_cat_feature_indices()), in the model's order.
+    Missing categoricals are "Unknown", missing numbers NaN.
+    """
+    names = list(model.feature_names_)
+    cat_names = [names[i] for i in model.get_cat_feature_indices()]
+
+    features = pd.DataFrame(index=listings.index)
+    for col in names:
+        values = listings[col] if col in listings.columns else pd.Series(np.nan, index=listings.index)
+        if col in cat_names:
+            features[col] = values.fillna("Unknown").astype(str)
+        else:
+            features[col] = pd.to_numeric(values, errors="coerce").astype(float)
+    return features, cat_names
+
+
+# -------------------
+# Comps index
+# -------------------
+class CompsIndex:
+    """
+    Prebuilt comps over the rental dataset: per (ZIP_CODE, PROP_TYPE, NO_BEDROOMS, TOTAL_BATHS) bucket,
+    SQUARE_FEET sorted with the matching rents, so the comps of a listing are one binary search
+    (np.searchsorted) instead of a scan of the dataset. Listings without comps fall back to the
+    (ZIP_CODE, PROP_TYPE) market median.
+    """
+
+    def __init__(self, df):
+        df = df.dropna(subset=COMP_KEY_COLUMNS + ["SQUARE_FEET", TARGET_COLUMN])
+        sqft = pd.to_numeric(df["SQUARE_FEET"], errors="coerce").to_numpy(dtype=float)
+        rent = pd.to_numeric(df[TARGET_COLUMN], errors="coerce").to_numpy(dtype=float)
+
+        self.buckets = {}
+        groups = _group(_keys(df, COMP_KEY_COLUMNS))
+        for key, positions in groups.items():
+            order = positions[np.argsort(sqft[positions], kind="stable")]
+            self.buckets[key] = (sqft[order], rent[order])
+
+        self.market = {}
+        groups = _group(_keys(df, MARKET_KEY_COLUMNS))
+        for key, positions in groups.items():
+            self.market[key] = (float(np.median(rent[positions])), len(positions))
+
+    def query(self, listings):
+        """
+        Returns (median_rent, num_comps, comps_level) arrays for the listings.
+        """
+        n = len(listings)
+        medians = np.full(n, np.nan)
+        counts = np.zeros(n, dtype=int)
+        levels = np.array([None] * n, dtype=object)
+
+        sqft = pd.to_numeric(listings["SQUARE_FEET"], errors="coerce").to_numpy(dtype=float)
+        comp_keys = _keys(listings, COMP_KEY_COLUMNS)
+        market_keys = _keys(listings, MARKET_KEY_COLUMNS)
+
+        # listings with the same key share one bucket lookup and one vectorized searchsorted
+        for key, positions in _group(comp_keys).items():
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            bucket_sqft, bucket_rent = bucket
+            low = np.searchsorted(bucket_sqft, sqft[positions] * (1 - SQFT_TOLERANCE), side="left")
+            high = np.searchsorted(bucket_sqft, sqft[positions] * (1 + SQFT_TOLERANCE), side="right")
+            for position, lo, hi in zip(positions, low, high):
+                if hi > lo:
+                    medians[position] = np.median(bucket_rent[lo:hi])
+                    counts[position] = hi - lo
+                    levels[position] = "comps"
+
+        for position in np.flatnonzero(counts == 0):
+            market = self.market.get(market_keys[position])
+            if market is not None:
+                medians[position], counts[position] = market
+                levels[position] = "market"
+
+        return medians, counts, levels
+
+
+# one comps index per dataset (rental_api.py loads the dataset once and passes the same DataFrame)
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_comps_index(df):
+    with _lock:
+        cached = _indexes.get(id(df))
+        # keep a reference to df, so its id cannot be reused by another DataFrame
+        if cached is None or cached[0] is not df or cached[2] != len(df):
+            cached = _indexes[id(df)] = (df, CompsIndex(normalize_columns(df.copy())), len(df))
+        return cached[1]
+
+
+# -------------------
+# Evaluation
+# -------------------
+def _round(value):
+    return None if value is None or pd.isna(value) else round(float(value), 2)
+
+
+def evaluate_listing(query, df, model, features_used=None):
+    """
+    Evaluates one listing (dict) or several (list of dicts) against the rental dataset:
+    predicted rent (one batched CatBoost call), median rent of the comps, how far the prediction is
+    from it, and, when the listing has an asking rent (LIST_PRICE), whether it is priced above or below
+    the prediction. Returns a dict for a dict, a list of dicts for a list.
+    """
+    single = isinstance(query, dict)
+    records = [query] if single else list(query)
+    if not records:
+        return []
+
+    listings = normalize_columns(pd.DataFrame.from_records(records))
+    missing = [col for col in (features_used or []) if col not in listings.columns]
+    if missing:
+        raise ValueError(f"Missing listing fields: {missing}")
+
+    features, cat_names = build_features(listings, model)
+    predicted = model.predict(Pool(features, cat_features=cat_names))
+
+    medians, counts, levels = get_comps_index(df).query(listings)
+    asking = pd.to_numeric(listings[TARGET_COLUMN], errors="coerce").to_numpy(dtype=float) \
+        if TARGET_COLUMN in listings.columns else np.full(len(listings), np.nan)
+
+    results = []
+    for i in range(len(listings)):
+        diff = predicted[i] - medians[i] if counts[i] else np.nan
+        result = {
+            "predicted_rent": _round(predicted[i]),
+            "median_rent": _round(medians[i]) if counts[i] else None,
+            "difference_from_median": _round(diff),
+            "likelihood": _round(1 - abs(diff) / medians[i]) if counts[i] and medians[i] else None,
+            "num_comps": int(counts[i]),
+            "comps_level": levels[i]
+        }
+        if not np.isnan(asking[i]):
+            gap = (asking[i] - predicted[i]) / predicted[i]
+            result["asking_rent"] = _round(asking[i])
+            result["pricing_risk"] = "overpriced" if gap > PRICING_TOLERANCE else \
+                "underpriced" if gap < -PRICING_TOLERANCE else "aligned"
+        results.append(result)
+
+    return results[0] if single else results
+
+
+# -------------------
+# Benchmark: python -m evaluate.evaluator --data data/Rental_Dataset.csv --model data/rent_predictor_model.cbm
+# -------------------
+def main():
+    from model.model_loader import load_model
+
+    parser = argparse.ArgumentParser(description="Time evaluate_listing per request and per batch.")
+    parser.add_argument("--data", default="data/Rental_Dataset.csv")
+    parser.add_argument("--model", default="data/rent_predictor_model.cbm")
+    parser.add_argument("--requests", type=int, default=200, help="Single-listing requests to time")
+    parser.add_argument("--batch", type=int, default=1000, help="Listings per batch")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data, low_memory=False)
+    model = load_model(args.model)
+    sample = normalize_columns(df.copy()).sample(args.batch, replace=True, random_state=0).to_dict("records")
+
+    start = time.perf_counter()
+    get_comps_index(df)
+    print(f"comps index build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    for record in sample[:args.requests]:
+        evaluate_listing(record, df, model)
+    per_request = (time.perf_counter() - start) / args.requests
+    print(f"per request: {per_request * 1000:.2f} ms")
+
+    start = time.perf_counter()
+    evaluate_listing(sample, df, model)
+    per_batch = time.perf_counter() - start
+    print(f"batch of {args.batch}: {per_batch * 1000:.1f} ms ({per_batch / args.batch * 1000:.3f} ms per listing)")
+
+
+if __name__ == "__main__":
+    main()
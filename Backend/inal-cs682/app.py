@@ -1,13 +1,28 @@
+import os
+import sys
+import math
 from flask import Flask, render_template, request, jsonify
-import tensorflow as tf
 import pandas as pd
 from predict import predict_price
+from model_registry import score, prewarm, load_stats, resident_memory_mb, model_path, get_registry
+from listings import get_listing_index, get_tile_index, RANGE_COLUMNS, EQUALITY_COLUMNS, DEFAULT_PAGE_SIZE, LISTINGS_PATH
+from shadow import shadow_status
+
+# shared response middleware (Backend/web), also used by katt-cs682
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from web import install, file_version
 
 app = Flask(__name__)
 
-# Load model
-MODEL_PATH = "./experiments/model-1"
-model = tf.keras.models.load_model(MODEL_PATH)
+# orjson + compression + ETags: cached GET responses stay valid until the model or the listings file changes
+# (model-stats changes on every request, so it is never cached)
+VERSION = f"{file_version(model_path())}:{file_version(LISTINGS_PATH)}"
+install(app, lambda: VERSION, no_etag=("api_model_stats",))
+
+# The model is loaded lazily through model_registry (shared model registry, also used by predict.py) on the first prediction.
+# Set PREWARM_MODEL=1 to load it at startup instead.
+if os.environ.get("PREWARM_MODEL", "0") == "1":
+    print(f"Model pre-warmed: {prewarm()}")
 
 # feature columns in training order
 feature_columns = [
@@ -47,6 +62,22 @@ def preprocess_single_input(raw_df):
     return raw_df.astype(float)
 
 
+def query_number(name, cast=float, default=None):
+    """
+    Numeric query parameter: default when absent or empty, ValueError when it is not a (finite) number.
+    """
+    value = request.args.get(name, '').strip()
+    if not value:
+        return default
+    try:
+        number = cast(value)
+    except ValueError:
+        raise ValueError(f"{name} must be {'an integer' if cast is int else 'a number'}, got {value!r}")
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be a finite number, got {value!r}")
+    return number
+
+
 @app.route("/", methods=['GET'])
 def home():
     return render_template('index.html')
@@ -67,7 +98,8 @@ def predict():
             return "Expected a single input vector (1 row)."
 
         X_input = preprocess_single_input(raw_df)
-        prediction = model.predict(X_input)[0][0]
+        # champion prediction; the challenger (CHALLENGER_MODEL) is scored in the background and never affects it
+        prediction = score(X_input)[0]
 
         return f"<h2 class='text-center mt-5'>Predicted Property Price: ${prediction:,.2f}</h2>"
 
@@ -85,5 +117,62 @@ def api_predict():
         return jsonify({'error': str(e)}), 400
 
 
+@app.route('/api/model-stats', methods=['GET'])
+def api_model_stats():
+    # cold-start time and resident memory (MB) of the model, for start-up profiling
+    return jsonify({'loaded': bool(load_stats()), 'load': load_stats(),
+                    'resident_mb': round(resident_memory_mb(), 1),
+                    'shadow': shadow_status(get_registry())})
+
+
+@app.route('/api/listings', methods=['GET'])
+def api_listings():
+    """
+    One page of the sold listings, filtered and sorted on the server.
+
+    Query parameters:
+        min_price, max_price, min_sqft, max_sqft, min_beds, max_beds, min_baths, max_baths,
+        min_year_built, max_year_built: range filters
+        postal_code, city, state_code: exact (case-insensitive) filters
+        address: case-insensitive substring of the address
+        sort_by (price, sqft, beds, baths, year_built; default price), sort (asc or desc; default: file order)
+        page (1-based), page_size (default 50, at most 500)
+    """
+    try:
+        args = request.args
+        # malformed bounds are rejected (400) instead of silently dropping the filter
+        ranges = {column: (query_number(f'min_{name}'), query_number(f'max_{name}'))
+                  for name, column in RANGE_COLUMNS.items()}
+        equals = {column: args.get(name) for name, column in EQUALITY_COLUMNS.items()}
+
+        sort = args.get('sort')
+        if sort not in (None, 'asc', 'desc'):
+            return jsonify({'error': "sort must be 'asc' or 'desc'"}), 400
+        sort_by = RANGE_COLUMNS.get(args.get('sort_by', 'price')) if sort else None
+
+        page, page_size = query_number('page', int, 1), query_number('page_size', int, DEFAULT_PAGE_SIZE)
+
+        return jsonify(get_listing_index().query(
+            ranges, equals, address=args.get('address'), sort_by=sort_by, descending=sort == 'desc',
+            page=page, page_size=page_size))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/listings/map', methods=['GET'])
+def api_listings_map():
+    """
+    Listings in a map viewport: ?bbox=west,south,east,north&zoom=12. At low zoom, dense viewports
+    are returned as clusters (count, centroid, average price) instead of individual listings.
+    """
+    try:
+        west, south, east, north = (float(value) for value in request.args['bbox'].split(','))
+        return jsonify(get_tile_index().query(west, south, east, north, query_number('zoom', int, 12)))
+    except KeyError:
+        return jsonify({'error': 'bbox is required (west,south,east,north)'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
 if __name__ == '__main__':
     app.run(port=3000, debug=True)
\ No newline at end of file
@@ -4,17 +4,126 @@
 
 import tensorflow as tf
 import numpy as np
-from sklearn.model_selection import train_test_split
 import pandas as pd
 import argparse
+import json
+import time
+from preprocess import TRAIN_COLUMNS
+from src.utils.feature_store import store_exists, load_feature_store, load_splits, split_positions
+
+# absolute error quantiles reported in batch mode
+ERROR_QUANTILES = [0.5, 0.75, 0.9, 0.95, 0.99]
+
+
+def parse_indices(spec: str):
+    '''
+    parse_indices() method parses a list/range specification of test set indices,
+    e.g. "3,11,20-29" -> [3, 11, 20, 21, ..., 29] (ranges are inclusive).
+    '''
+    indices = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            indices.extend(range(int(start), int(end) + 1))
+        else:
+            indices.append(int(part))
+    return indices
+
+
+def compute_metrics(y_true, y_pred):
+    '''
+    compute_metrics() method computes the regression metrics of a batch of predictions:
+    MAE, RMSE, MAPE (%, over non-zero targets) and quantiles of the absolute error.
+    '''
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    errors = y_pred - y_true
+    abs_errors = np.abs(errors)
+    nonzero = y_true != 0
+
+    return {
+        "count": int(len(y_true)),
+        "mae": float(abs_errors.mean()),
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "mape": float(np.mean(abs_errors[nonzero] / np.abs(y_true[nonzero])) * 100) if nonzero.any() else None,
+        "abs_error_quantiles": {str(q): float(v) for q, v in
+                                zip(ERROR_QUANTILES, np.quantile(abs_errors, ERROR_QUANTILES))}
+    }
+
+
+def group_breakdown(X, y_true, y_pred, prefix: str):
+    '''
+    group_breakdown() method computes compute_metrics() per category of a one-hot encoded
+    variable (e.g. prefix "PROP_TYPE_" or "COUNTY_"). Rows with no active one-hot column
+    are reported under "Unknown".
+    '''
+    columns = [col for col in TRAIN_COLUMNS if col.startswith(prefix)]
+    positions = [TRAIN_COLUMNS.index(col) for col in columns]
+    one_hot = np.asarray(X[:, positions])
+
+    labels = np.array([col[len(prefix):] for col in columns] + ["Unknown"])
+    category = np.where(one_hot.max(axis=1) > 0, one_hot.argmax(axis=1), len(columns))
+
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    return {str(labels[c]): compute_metrics(y_true[category == c], y_pred[category == c])
+            for c in np.unique(category)}
+
+
+def evaluate_batch(model, X, y, rows, batch_size: int = 1024):
+    '''
+    evaluate_batch() method predicts the given dataset rows in one batched pass and returns
+    overall metrics, per-PROP_TYPE/COUNTY breakdowns and timing as a dictionary.
+    '''
+    rows = np.sort(np.asarray(rows))  # sorted reads are sequential on the memory map
+
+    start = time.perf_counter()
+    X_batch = np.asarray(X[rows], dtype=np.float32)
+    y_batch = np.asarray(y[rows], dtype=np.float32)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_batch, batch_size=batch_size, verbose=0).reshape(-1)
+    predict_time = time.perf_counter() - start
+
+    return {
+        "metrics": compute_metrics(y_batch, y_pred),
+        "by_prop_type": group_breakdown(X_batch, y_batch, y_pred, "PROP_TYPE_"),
+        "by_county": group_breakdown(X_batch, y_batch, y_pred, "COUNTY_"),
+        "timing": {
+            "data_seconds": load_time,
+            "predict_seconds": predict_time,
+            "predict_ms_per_sample": predict_time * 1000 / max(len(rows), 1)
+        }
+    }
+
 
 def main():
     # Parse command-line arguments
-    parser = argparse.ArgumentParser(description="Make prediction for i-th sample in test set.")
-    parser.add_argument("--indexprop", type=int, required=True, help="Index of the test sample to evaluate")
+    parser = argparse.ArgumentParser(description="Make prediction for i-th sample in test set, or score many samples in one batch.")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--indexprop", type=int, help="Index of the test sample to evaluate")
+    mode.add_argument("--all", action="store_true", help="Score the entire test set in one batch")
+    mode.add_argument("--indices", type=str, help="List/range of test sample indices to score in one batch, e.g. 3,11,20-29")
+    parser.add_argument("--output", type=str, default=None, help="Write the batch results as JSON to this file (default: print)")
     args = parser.parse_args()
     i = args.indexprop
 
+    # parse the selection before loading anything, so an invalid or empty --indices fails fast
+    indices = None
+    if args.indices is not None:
+        try:
+            indices = parse_indices(args.indices)
+        except ValueError:
+            parser.error(f"--indices {args.indices!r} is not a list/range of integers, e.g. 3,11,20-29")
+        if not indices:
+            parser.error(f"--indices {args.indices!r} selects no test samples")
+
+    start_time = time.perf_counter()
+
     # Step 1: Load the model
     model_path = "./experiments/model-1"
     model = tf.keras.models.load_model(model_path)
@@ -22,34 +131,61 @@ def main():
     # Paths 
     features_path = "./data/features.csv"
     targets_path = "./data/targets.csv"
+    store_dir = "./data/store"
 
-    # Load data
-    X = pd.read_csv(features_path)
-    y = pd.read_csv(targets_path)
-
-    if len(y.columns) == 1:
-        y = y.iloc[:, 0]
+    # Load data: memory-map the binary feature store and its persisted split if it exists
+    # (no CSV parsing, no re-splitting, only the evaluated row is read from disk),
+    # otherwise fall back to the .csv files and recompute the split
+    if store_exists(store_dir):
+        X, y, _ = load_feature_store(store_dir)
+        splits = load_splits(store_dir)
+    else:
+        X = pd.read_csv(features_path).to_numpy(dtype=np.float32)
+        y = pd.read_csv(targets_path).iloc[:, 0].to_numpy(dtype=np.float32)
+        splits = split_positions(len(y))
 
-    # Split the data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    X_train, X_val, y_train, y_val = train_test_split(X_train, y_train, test_size=0.2, random_state=42)
+    train_idx, val_idx, test_idx = splits["train"], splits["val"], splits["test"]
 
     print("********************* SHAPES ********************** \n")
-    print(X_train.shape, X_val.shape, X_test.shape, y_train.shape, y_val.shape, y_test.shape)
+    print(len(train_idx), len(val_idx), len(test_idx))
     print("*************************************************** \n")
 
+    # Batch mode: score many test samples in one pass and report metrics as JSON
+    if i is None:
+        if args.all:
+            selected = np.arange(len(test_idx))
+        else:
+            selected = np.asarray(indices)
+            out_of_bounds = selected[(selected < 0) | (selected >= len(test_idx))]
+            if len(out_of_bounds):
+                raise IndexError(f"Indices {out_of_bounds.tolist()} are out of bounds for X_test of length {len(test_idx)}.")
+
+        startup_time = time.perf_counter() - start_time
+        results = evaluate_batch(model, X, y, test_idx[selected])
+        results["timing"]["startup_seconds"] = startup_time
+        results["timing"]["total_seconds"] = time.perf_counter() - start_time
+
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(results, file, indent=2)
+            print(f"Wrote results for {len(selected)} samples to {args.output}")
+        else:
+            print(json.dumps(results, indent=2))
+        return
+
     # Ensure index is within bounds
-    if i < 0 or i >= len(X_test):
-        raise IndexError(f"Index i={i} is out of bounds for X_test of length {len(X_test)}.")
+    if i < 0 or i >= len(test_idx):
+        raise IndexError(f"Index i={i} is out of bounds for X_test of length {len(test_idx)}.")
 
-    sample_input = X_test.iloc[i].values.reshape(1, -1)
+    row = test_idx[i]
+    sample_input = np.asarray(X[row], dtype=np.float32).reshape(1, -1)
     prediction = model.predict(sample_input)
 
-    print(f"Actual value for sample {i} in y_test: {y_test.iloc[i]} \n")
+    print(f"Actual value for sample {i} in y_test: {y[row]} \n")
     print("\nPrediction for the sample in X_test: \n")
     print(prediction)
 
-    print(f"\n ************* \n Absolute error between the two: {abs(prediction - y_test.iloc[i])} \n ************* \n ")
+    print(f"\n ************* \n Absolute error between the two: {abs(prediction - y[row])} \n ************* \n ")
 
 if __name__ == "__main__":
     main()
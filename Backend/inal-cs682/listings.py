@@ -0,0 +1,335 @@
+import os
+import math
+import threading
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+'''
+In-memory columnar index over the sold listings served by GET /api/listings.
+
+The frontend used to download the whole sold_data.csv and filter it in the browser. Here every
+range column (price, square feet, beds, baths, year built) is kept as a numpy array together with
+its argsort, so a range filter is two binary searches (np.searchsorted) instead of a scan, and
+equality filters (ZIP code, town, state) are hash lookups. Only the candidate rows of the most
+selective filter are checked against the other filters, and only one page of rows is serialized.
+
+The map viewport (GET /api/listings/map) uses a separate grid index, TileIndex: every listing gets
+the quadkey of its web-mercator tile at MAX_TILE_ZOOM, and the rows are sorted by quadkey. All the
+listings of a tile at any lower zoom then have the same quadkey prefix, i.e. they form one contiguous
+range of the sorted rows, found with two binary searches.
+'''
+
+LISTINGS_PATH = os.environ.get("LISTINGS_CSV", "../../Frontend/public/data/sold_data.csv")
+
+# query parameter name -> column
+RANGE_COLUMNS = {
+    "price": "LIST_PRICE",
+    "sqft": "SQUARE_FEET",
+    "beds": "NO_BEDROOMS",
+    "baths": "TOTAL_BATHS",
+    "year_built": "YEAR_BUILT"
+}
+EQUALITY_COLUMNS = {
+    "postal_code": "ZIP_CODE",
+    "city": "TOWN",
+    "state_code": "STATE"
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# map: tiles are indexed down to MAX_TILE_ZOOM; at lower zooms, views with more than MAX_MAP_LISTINGS
+# listings are returned as clusters (one per 1/2**CLUSTER_CELL_BITS of a tile side)
+MAP_COLUMNS = ["LIST_NO", "ADDRESS", "LIST_PRICE", "NO_BEDROOMS", "TOTAL_BATHS", "SQUARE_FEET", "LATITUDE", "LONGITUDE"]
+MAX_TILE_ZOOM = 16
+CLUSTER_MAX_ZOOM = 15
+CLUSTER_CELL_BITS = 3
+MAX_MAP_LISTINGS = 500
+MAX_VIEW_TILES = 256
+TILE_CACHE_SIZE = 4096
+MAX_LATITUDE = 85.05112878
+
+
+def _key(value):
+    # equality keys are compared as lower-case strings ("02134" and 2134 both match 2134)
+    if pd.isna(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip().lstrip("0").lower() or "0"
+
+
+class ListingIndex:
+    """
+    Sorted indexes over the range columns and hash indexes over the equality columns of a
+    listings DataFrame. Built once; queries do not modify it, so it can be shared between threads.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.reset_index(drop=True)
+        self.n = len(self.df)
+
+        # range columns: values, positions sorted by value ascending/descending (NaN last in both)
+        # and the sorted values
+        self.values, self.order, self.order_desc, self.sorted_values = {}, {}, {}, {}
+        for column in RANGE_COLUMNS.values():
+            if column not in self.df.columns:
+                continue
+            values = pd.to_numeric(self.df[column], errors="coerce").to_numpy(dtype=float)
+            order = np.argsort(values, kind="stable")
+            self.values[column], self.order[column], self.sorted_values[column] = values, order, values[order]
+            self.order_desc[column] = np.argsort(-values, kind="stable")
+
+        # equality columns: key -> positions
+        self.buckets = {}
+        for column in EQUALITY_COLUMNS.values():
+            if column in self.df.columns:
+                keys = self.df[column].map(_key)
+                self.buckets[column] = {key: positions for key, positions in keys.groupby(keys).indices.items()}
+
+    def range_positions(self, column: str, low=None, high=None) -> np.ndarray:
+        """
+        Positions of the rows with low <= column <= high (either bound optional), in ascending column order.
+        """
+        sorted_values = self.sorted_values[column]
+        start = np.searchsorted(sorted_values, low, side="left") if low is not None else 0
+        # NaNs are sorted last and never match a range
+        stop = np.searchsorted(sorted_values, high, side="right") if high is not None \
+            else np.searchsorted(sorted_values, np.inf, side="right")
+        return self.order[column][start:stop]
+
+    def query(self, ranges: dict = None, equals: dict = None, address: str = None,
+              sort_by: str = None, descending: bool = False, page: int = 1,
+              page_size: int = DEFAULT_PAGE_SIZE) -> dict:
+        """
+        Filter, sort and paginate the listings.
+
+        Args:
+            ranges (dict): {column: (low, high)}, either bound may be None
+            equals (dict): {column: value}, case-insensitive
+            address (str): case-insensitive substring of ADDRESS
+            sort_by (str): range column to sort by (None keeps the file order)
+            descending (bool): sort order
+            page (int): 1-based page number
+            page_size (int): rows per page, at most MAX_PAGE_SIZE
+
+        Returns:
+            dict: total number of matches, page, page_size and the page's rows
+        """
+        ranges = {col: bounds for col, bounds in (ranges or {}).items()
+                  if col in self.sorted_values and bounds != (None, None)}
+        equals = {col: value for col, value in (equals or {}).items() if value not in (None, "")}
+
+        # candidate sets: one per filter, smallest first
+        candidates = [self.range_positions(col, *bounds) for col, bounds in ranges.items()]
+        candidates += [self.buckets[col].get(_key(value), np.empty(0, dtype=np.int64)) if col in self.buckets
+                       else np.empty(0, dtype=np.int64) for col, value in equals.items()]
+        candidates.sort(key=len)
+
+        if candidates:
+            # check the other filters on the smallest candidate set only
+            positions = np.sort(candidates[0])
+            keep = np.ones(len(positions), dtype=bool)
+            for col, (low, high) in ranges.items():
+                values = self.values[col][positions]
+                if low is not None:
+                    keep &= values >= low
+                if high is not None:
+                    keep &= values <= high
+            for col, value in equals.items():
+                bucket = self.buckets.get(col, {}).get(_key(value))
+                keep &= np.isin(positions, bucket) if bucket is not None else False
+            positions = positions[keep]
+        else:
+            positions = None
+
+        if address:
+            rows = self.df["ADDRESS"] if positions is None else self.df["ADDRESS"].iloc[positions]
+            matches = rows.astype(str).str.contains(address, case=False, regex=False, na=False).to_numpy()
+            positions = np.flatnonzero(matches) if positions is None else positions[matches]
+
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        page = max(1, int(page))
+        total = self.n if positions is None else len(positions)
+        start, stop = (page - 1) * page_size, page * page_size
+
+        if sort_by in self.order:
+            if positions is None or len(positions) * np.log2(len(positions) + 2) > self.n:
+                # large result: walk the presorted index instead of sorting the matches
+                order = self.order_desc[sort_by] if descending else self.order[sort_by]
+                if positions is not None:
+                    selected = np.zeros(self.n, dtype=bool)
+                    selected[positions] = True
+                    order = order[selected[order]]
+                page_positions = order[start:stop]
+            else:
+                values = self.values[sort_by][positions]
+                keys = np.where(np.isnan(values), np.inf, -values if descending else values)
+                page_positions = positions[np.argsort(keys, kind="stable")][start:stop]
+        else:
+            page_positions = np.arange(self.n)[start:stop] if positions is None else positions[start:stop]
+
+        rows = self.df.iloc[page_positions]
+        return {
+            "total": int(total),
+            "page": page,
+            "page_size": page_size,
+            "pages": int(-(-total // page_size)),
+            "listings": rows.astype(object).where(rows.notna(), None).to_dict("records")
+        }
+
+
+def tile_xy(lat, lon, zoom: int):
+    """
+    Web-mercator (slippy map) tile coordinates of the points (lat, lon) at `zoom`.
+    """
+    n = 2 ** zoom
+    lat = np.radians(np.clip(np.asarray(lat, dtype=float), -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(lon, dtype=float) + 180.0) / 360.0 * n
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0 * n
+    return np.clip(x.astype(np.int64), 0, n - 1), np.clip(y.astype(np.int64), 0, n - 1)
+
+
+def quadkey(x, y, zoom: int):
+    """
+    Interleave the bits of tile coordinates (y bit above x bit at every level); tiles inside the
+    same lower-zoom tile share the key prefix.
+    """
+    key = np.zeros(np.shape(x), dtype=np.int64)
+    for bit in range(zoom):
+        key |= ((np.asarray(x) >> bit) & 1) << (2 * bit)
+        key |= ((np.asarray(y) >> bit) & 1) << (2 * bit + 1)
+    return key
+
+
+class TileIndex:
+    """
+    Spatial grid index over the listings with coordinates: rows sorted by their quadkey at MAX_TILE_ZOOM,
+    so the listings of any tile are a contiguous slice. Tile results (listings or clusters) are cached
+    (LRU, TILE_CACHE_SIZE tiles); the index is immutable, so cached tiles never go stale.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        located = df.dropna(subset=["LATITUDE", "LONGITUDE"]) if {"LATITUDE", "LONGITUDE"} <= set(df.columns) \
+            else df.iloc[:0].assign(LATITUDE=[], LONGITUDE=[])
+        x, y = tile_xy(located["LATITUDE"], located["LONGITUDE"], MAX_TILE_ZOOM)
+        keys = quadkey(x, y, MAX_TILE_ZOOM)
+        order = np.argsort(keys, kind="stable")
+
+        self.keys = keys[order]
+        self.df = located.iloc[order][[col for col in MAP_COLUMNS if col in located.columns]].reset_index(drop=True)
+        self.lat = self.df["LATITUDE"].to_numpy(dtype=float)
+        self.lon = self.df["LONGITUDE"].to_numpy(dtype=float)
+        self.price = pd.to_numeric(self.df.get("LIST_PRICE"), errors="coerce").to_numpy(dtype=float) \
+            if "LIST_PRICE" in self.df.columns else np.full(len(self.df), np.nan)
+        self.tile = lru_cache(maxsize=TILE_CACHE_SIZE)(self._tile)
+
+    def tile_range(self, zoom: int, x: int, y: int):
+        # rows of tile (zoom, x, y): the keys starting with the tile's quadkey
+        shift = 2 * (MAX_TILE_ZOOM - zoom)
+        prefix = int(quadkey(np.int64(x), np.int64(y), zoom))
+        start = np.searchsorted(self.keys, prefix << shift, side="left")
+        stop = np.searchsorted(self.keys, (prefix + 1) << shift, side="left")
+        return int(start), int(stop)
+
+    def _tile(self, zoom: int, x: int, y: int, clustered: bool) -> tuple:
+        start, stop = self.tile_range(zoom, x, y)
+        if start == stop:
+            return ()
+        if not clustered:
+            rows = self.df.iloc[start:stop]
+            return tuple(rows.astype(object).where(rows.notna(), None).to_dict("records"))
+
+        # clusters: group the tile's rows by their sub-cell (a longer quadkey prefix); rows are sorted
+        # by key, so each group is contiguous and reduceat gives the sums
+        cell_zoom = min(zoom + CLUSTER_CELL_BITS, MAX_TILE_ZOOM)
+        cells = self.keys[start:stop] >> (2 * (MAX_TILE_ZOOM - cell_zoom))
+        starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+        counts = np.diff(np.r_[starts, len(cells)])
+        lat = np.add.reduceat(self.lat[start:stop], starts) / counts
+        lon = np.add.reduceat(self.lon[start:stop], starts) / counts
+        price = self.price[start:stop]
+        valid = ~np.isnan(price)
+        priced = np.add.reduceat(valid.astype(int), starts)
+        price_sum = np.add.reduceat(np.where(valid, price, 0.0), starts)
+        return tuple(
+            {
+                "count": int(count),
+                "lat": round(float(la), 6),
+                "lon": round(float(lo), 6),
+                "avg_price": round(float(total / n_priced), 2) if n_priced else None
+            }
+            for count, la, lo, total, n_priced in zip(counts, lat, lon, price_sum, priced)
+        )
+
+    def query(self, west: float, south: float, east: float, north: float, zoom: int) -> dict:
+        """
+        Listings (or clusters, at low zoom with more than MAX_MAP_LISTINGS listings) in the bounding box.
+
+        Args:
+            west, south, east, north (float): bounding box in degrees (west > east crosses the antimeridian)
+            zoom (int): map zoom level
+
+        Returns:
+            dict: zoom, tiles, total, clustered and either the listings or the clusters in the box
+        """
+        zoom = max(0, min(int(zoom), MAX_TILE_ZOOM))
+        # tiles are looked up at a zoom where the box covers at most MAX_VIEW_TILES tiles
+        while True:
+            x_min, y_min = tile_xy(north, west, zoom)
+            x_max, y_max = tile_xy(south, east, zoom)
+            x_span = (int(x_max) - int(x_min)) % (2 ** zoom) + 1
+            y_span = int(y_max) - int(y_min) + 1
+            if x_span * y_span <= MAX_VIEW_TILES or zoom == 0:
+                break
+            zoom -= 1
+        tiles = [(zoom, (int(x_min) + i) % (2 ** zoom), int(y_min) + j) for i in range(x_span) for j in range(y_span)]
+
+        total = sum(stop - start for start, stop in (self.tile_range(*tile) for tile in tiles))
+        clustered = zoom < CLUSTER_MAX_ZOOM and total > MAX_MAP_LISTINGS
+
+        def in_box(lat, lon):
+            in_lon = west <= lon <= east if west <= east else (lon >= west or lon <= east)
+            return south <= lat <= north and in_lon
+
+        items = [item for tile in tiles for item in self.tile(*tile, clustered)
+                 if in_box(*((item["lat"], item["lon"]) if clustered else (item["LATITUDE"], item["LONGITUDE"])))]
+        return {
+            "zoom": zoom,
+            "tiles": len(tiles),
+            "total": sum(item["count"] for item in items) if clustered else len(items),
+            "clustered": clustered,
+            "clusters" if clustered else "listings": items
+        }
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _get_index(cls, path):
+    # one index of each kind per file, built on first use
+    index = _indexes.get((cls, path))
+    if index is None:
+        with _lock:
+            if (cls, path) not in _indexes:
+                df = pd.read_csv(path, low_memory=False)
+                df.columns = df.columns.str.strip()
+                _indexes[(cls, path)] = cls(df)
+            index = _indexes[(cls, path)]
+    return index
+
+
+def get_listing_index(path=LISTINGS_PATH):
+    """
+    Return the listing index, reading `path` and building it on first use.
+    """
+    return _get_index(ListingIndex, path)
+
+
+def get_tile_index(path=LISTINGS_PATH):
+    """
+    Return the map tile index, reading `path` and building it on first use.
+    """
+    return _get_index(TileIndex, path)
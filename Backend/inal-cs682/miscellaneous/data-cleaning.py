@@ -1,65 +1,60 @@
+import os
+import sys
 import pandas as pd
 '''
 This is coming from the original notebook script that was used to clean the data.
 This is meant to serve as reference for future needs.
 '''
-# 1. Load and Combine Data
-data = pd.concat([
-    pd.read_csv('house-prices1.csv'),
-    pd.read_csv('house-prices2.csv'),
-    pd.read_csv('house-prices3.csv'),
-    pd.read_csv('house-prices4.csv'),
-    pd.read_csv('house-prices5.csv'),
-    pd.read_csv('house-prices6.csv')
-])
-
-# 2. Select and Filter Columns 
-columns_to_keep = [
-    "LIST_PRICE", "NO_BEDROOMS", "NO_FULL_BATHS", "NO_HALF_BATHS", 
-    "TOTAL_BATHS", "SQUARE_FEET", "AboveGradeFinishedArea", 
-    "SQUARE_FEET_INCL_BASE", "LIST_PRICE_PER_SQFT", "PRICE_PER_SQFT", 
-    "PROP_TYPE", "YEAR_BUILT", "TOTAL_PARKING_SF", "COUNTY", 
-    "TAXES", "BASEMENT", "FIRE_PLACES", "ASSESSMENTS" 
-]
-df = data[columns_to_keep].dropna()
-
-# 3. Data Transformation and Encoding
-df["SQUARE_FEET_INCL_BASE"] = df["SQUARE_FEET_INCL_BASE"].map({"Yes": 1, "No": 0}).astype(int)
-df["BASEMENT"] = df["BASEMENT"].map({"Yes": 1, "No": 0}).astype(int)
-
-# One-hot encoding for categorical variables
-categorical_cols = ["PROP_TYPE", "COUNTY"] 
-df = pd.get_dummies(df, columns=categorical_cols, dtype=int) 
-
-# Convert boolean columns to integers (True -> 1, False -> 0)
-
-# Convert boolean columns to integers, if any
-for col in df.select_dtypes(include=['bool']).columns:
-    df[col] = df[col].astype(int)
-
-
-# 4. Outlier Handling (using IQR)
-continuous_columns = [
-    'NO_BEDROOMS', 'NO_FULL_BATHS', 'NO_HALF_BATHS', 'TOTAL_BATHS',
-    'SQUARE_FEET', 'AboveGradeFinishedArea', 'SQUARE_FEET_INCL_BASE',
-    'LIST_PRICE_PER_SQFT', 'PRICE_PER_SQFT', 'YEAR_BUILT', 'TOTAL_PARKING_SF',
-    'TAXES', 'BASEMENT', 'FIRE_PLACES', 'ASSESSMENTS'
-]
-for col in continuous_columns:
-    Q1 = df[col].quantile(0.25)
-    Q3 = df[col].quantile(0.75)
-    IQR = Q3 - Q1
-    df = df[(df[col] >= Q1 - 1.5 * IQR) & (df[col] <= Q3 + 1.5 * IQR)]
-
-# 5. Convert to float
-X = df.drop(columns=['LIST_PRICE'])  # Features (all columns except 'LIST_PRICE')
-y = df['LIST_PRICE']  # Target variable ('LIST_PRICE')
-
-X = X.astype(float) 
-y = y.astype(float)
-
-# 6. Save Cleaned Data 
-# X.to_csv('features.csv', index=False)
-# y.to_csv('targets.csv', index=False)
-
-df.to_csv('final-cleaned_data.csv', index=False) #Saving complete data
+# make the inal-cs682 root importable (for the cleaning pipeline and the feature store writer)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.utils.feature_store import write_feature_store
+from src.utils.cleaning import (find_exports, stream_clean_exports, filter_outliers,
+                                stream_filter_outliers, CONTINUOUS_COLUMNS)
+# Outlier handling (step 4, using IQR), see src/utils/cleaning.py
+#   "sequential":   original semantics, each column's quartiles are computed on the rows kept by the previous columns
+#   "simultaneous": all quartiles computed in one pass on the same rows, one combined mask (independent of column order)
+#   "streaming":    simultaneous, computed chunk by chunk on encoded_data.csv (bounds estimated from a bounded sample)
+OUTLIER_MODE = "sequential"
+
+
+def main():
+    # 1-3. Stream the exports: each house-prices*.csv is read in chunks with only the kept columns
+    # (explicit dtypes), every chunk is filtered (dropna) and encoded (Yes/No -> 1/0, one-hot PROP_TYPE
+    # and COUNTY against the training columns) on its own and appended to encoded_data.csv,
+    # so peak memory does not grow with the number of yearly exports.
+    # The exports are cleaned in parallel, one per worker process (column names are matched after
+    # normalization, see src/utils/ingest.py). See src/utils/cleaning.py for the column lists and the per-chunk encoding.
+    exports = find_exports('.')
+    n_rows = stream_clean_exports(exports, 'encoded_data.csv', workers=min(len(exports), os.cpu_count() or 1))
+    print(f"Encoded {n_rows} rows from {len(exports)} exports")
+
+    # 4. Outlier Handling (using IQR), see src/utils/cleaning.py and OUTLIER_MODE above
+    if OUTLIER_MODE == "streaming":
+        stream_filter_outliers('encoded_data.csv', 'filtered_data.csv')
+        df = pd.read_csv('filtered_data.csv', dtype=float)
+    else:
+        # the encoded file is all-numeric (target + TRAIN_COLUMNS), i.e. much smaller than the raw exports
+        df = pd.read_csv('encoded_data.csv', dtype=float)
+        df = filter_outliers(df, CONTINUOUS_COLUMNS, mode=OUTLIER_MODE)
+
+    # 5. Convert to float
+    X = df.drop(columns=['LIST_PRICE'])  # Features (all columns except 'LIST_PRICE')
+    y = df['LIST_PRICE']  # Target variable ('LIST_PRICE')
+
+    X = X.astype(float) 
+    y = y.astype(float)
+
+    # 6. Save Cleaned Data 
+    # X.to_csv('features.csv', index=False)
+    # y.to_csv('targets.csv', index=False)
+
+    df.to_csv('final-cleaned_data.csv', index=False) #Saving complete data
+
+    # 7. Save the binary feature store (memory-mapped float32 .npy + schema.json) used by train.py/evaluate.py
+    # copy the store directory to inal-cs682/data/store
+    write_feature_store(X, y, 'store')
+
+
+# the exports are cleaned in worker processes, which re-import this script under the spawn start method
+if __name__ == "__main__":
+    main()
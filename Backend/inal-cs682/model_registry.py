@@ -0,0 +1,127 @@
+import os
+import sys
+import time
+import threading
+import resource
+
+# the shared model registry (Backend/model) serves the price model of this app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model.registry import get_registry
+from shadow import challenger_version, install_shadow_log
+
+'''
+Lazily-initialized access to the Keras price model, through the shared model registry
+(Backend/model/registry.py, model name "price", versions = ./experiments/model-N).
+
+predict.py and app.py both get the model from here, so it is loaded (and TensorFlow is imported)
+at most once per process, on the first prediction rather than at import time.
+Set PREWARM_MODEL=1 to load the model and run one dummy prediction when app.py starts instead.
+score() predicts with the champion (PRICE_MODEL_VERSION, default: the registry's default version)
+and, when CHALLENGER_MODEL is set, scores the challenger on the same input through the registry's
+shadow path (see shadow.py).
+'''
+
+MODEL_NAME = "price"
+MODEL_VERSION = os.environ.get("PRICE_MODEL_VERSION")
+
+_load_stats = {}
+_lock = threading.Lock()
+
+
+def resident_memory_mb():
+    """
+    Current resident memory of the process in MB (peak resident memory where /proc is not available).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in KB on Linux and in bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss / 1024 ** 2 if os.uname().sysname == "Darwin" else max_rss / 1024
+
+
+def get_model(version=MODEL_VERSION):
+    """
+    Return the price model `version` (default: the champion), loading it on first use.
+
+    Args:
+        version (str): Model version, e.g. "1" for ./experiments/model-1
+
+    Returns:
+        tf.keras.Model: The loaded model (the same object while it stays resident in the registry)
+    """
+    registry = get_registry()
+    version = registry.artifact(MODEL_NAME, version).version
+    if version in _load_stats:
+        return registry.get(MODEL_NAME, version)
+
+    with _lock:
+        # another thread may have loaded it while we were waiting for the lock
+        if version not in _load_stats:
+            start = time.perf_counter()
+            memory_before = resident_memory_mb()
+
+            # TensorFlow is imported by the registry's loader: importing it dominates start-up time
+            model = registry.get(MODEL_NAME, version)
+
+            _load_stats[version] = {
+                "version": version,
+                "load_seconds": round(time.perf_counter() - start, 3),
+                "resident_mb_before": round(memory_before, 1),
+                "resident_mb_after": round(resident_memory_mb(), 1)
+            }
+            return model
+
+    return registry.get(MODEL_NAME, version)
+
+
+def score(X):
+    """
+    Champion price predictions for the model input X (n x n_features). With CHALLENGER_MODEL set,
+    the challenger is scored on the same X in the background (registry shadow path); this never
+    delays or fails the champion prediction.
+
+    Returns:
+        np.ndarray: One predicted price per row of X
+    """
+    get_model()  # records the load statistics on the first call
+    challenger = challenger_version()
+    if challenger is not None:
+        install_shadow_log(get_registry())
+    predictions, _ = get_registry().predict(MODEL_NAME, X, version=MODEL_VERSION,
+                                            shadow=(challenger,) if challenger is not None else ())
+    return predictions
+
+
+def model_path(version=MODEL_VERSION):
+    """
+    Saved model directory of the price model `version` (default: the champion).
+    """
+    return get_registry().artifact(MODEL_NAME, version).path
+
+
+def prewarm(version=MODEL_VERSION):
+    """
+    Load the model and run one dummy prediction, so the first request does not pay
+    for the TensorFlow import, the model load or the graph tracing.
+
+    Returns:
+        dict: Load statistics (see load_stats)
+    """
+    import numpy as np
+    from preprocess import TRAIN_COLUMNS
+
+    model = get_model(version)
+    model.predict(np.zeros((1, len(TRAIN_COLUMNS)), dtype=np.float32), verbose=0)
+    return load_stats(version)
+
+
+def load_stats(version=MODEL_VERSION):
+    """
+    Cold-start statistics of the model `version`: load time (including the TensorFlow import)
+    and resident memory before/after loading, in MB. Empty if the model has not been loaded yet.
+    """
+    version = get_registry().artifact(MODEL_NAME, version).version
+    return dict(_load_stats.get(version, {}))
@@ -1,10 +1,6 @@
-import tensorflow as tf
 import pandas as pd
 from preprocess import preprocess_single_input
-
-# Load model
-MODEL_PATH = "./experiments/model-1"
-model = tf.keras.models.load_model(MODEL_PATH)
+from model_registry import score
 
 def predict_price(property_data):
     """
@@ -20,10 +16,8 @@ def predict_price(property_data):
         # Preprocess the input data
         preprocessed_data = preprocess_single_input(property_data)
         
-        # Make prediction
-        prediction = model.predict(preprocessed_data)[0][0]
-        
-        return float(prediction)
+        # Make prediction (the challenger, if any, is scored in the background, see model_registry.score)
+        return float(score(preprocessed_data)[0])
     except Exception as e:
         print(f"Error making prediction: {str(e)}")
         return None 
\ No newline at end of file
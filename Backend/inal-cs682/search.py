@@ -0,0 +1,328 @@
+# Written by Inal Mashukov
+# for CS 682
+# University of Massachusetts Boston
+
+import os
+import json
+import time
+import math
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pandas as pd
+from src.utils.feature_store import store_exists, write_feature_store, load_feature_store, load_splits
+
+'''
+Parallel hyperparameter search for PricePredictionModel.
+
+Trials (configurations sampled from the "space" of config/search.json, everything else taken from
+config/config.json) run concurrently as separate CPU processes, each limited to threads_per_worker
+TensorFlow/OpenMP threads, so the processes do not oversubscribe the cores.
+
+The training and validation splits of the feature store are written once per search as contiguous
+float32 .npy files and memory-mapped read-only by every worker, so all workers share one copy of the
+data in the OS page cache. Batches are contiguous slices of the memory map (rows are shuffled once
+when the files are written, batch order is reshuffled every epoch).
+
+Early termination uses asynchronous successive halving (ASHA): a trial trains min_epochs first
+(rung 0); whenever a worker is free, the best 1/eta of the trials finished at a rung that have not
+been promoted yet continue (from their saved weights) to eta times the epochs of that rung, up to
+max_epochs; otherwise a new trial starts. Most configurations are stopped after min_epochs, and
+workers never wait for a rung to complete.
+
+Every finished job (trial, rung, epochs, configuration, metric, time) is appended to
+results.jsonl in the search directory; best.json holds the best configuration in the format of
+config/config.json.
+
+Run from the inal-cs682 directory:
+    python3 search.py --config ./config/search.json --workers 4 --threads-per-worker 2
+'''
+
+# worker process state (set by _init_worker)
+_worker = {}
+
+
+def sample_configs(space: dict, n_trials: int, seed: int = 42):
+
+    '''
+    sample_configs() method draws n_trials configurations from the search space.
+    A list is sampled uniformly, {"uniform": [low, high]} and {"log_uniform": [low, high]} as floats.
+
+    returns a list of dictionaries {parameter: value}
+    '''
+
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n_trials):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, dict) and "log_uniform" in values:
+                low, high = values["log_uniform"]
+                config[name] = float(math.exp(rng.uniform(math.log(low), math.log(high))))
+            elif isinstance(values, dict) and "uniform" in values:
+                config[name] = float(rng.uniform(*values["uniform"]))
+            else:
+                value = values[rng.integers(len(values))]
+                config[name] = value.item() if isinstance(value, np.generic) else value
+        configs.append(config)
+    return configs
+
+
+class ASHAScheduler:
+
+    '''
+    Asynchronous successive halving.
+
+    Args:
+
+        - n_trials : number of configurations to start
+        - min_epochs : epochs of rung 0
+        - max_epochs : epochs of the last rung
+        - eta : reduction factor (the best 1/eta of a rung is promoted, with eta times the epochs)
+
+    next_job() returns (trial, rung) or None when nothing can be started right now;
+    report() records the metric (lower is better) of a finished job.
+    '''
+
+    def __init__(self, n_trials: int, min_epochs: int, max_epochs: int, eta: int = 3):
+        self.n_trials = n_trials
+        self.eta = eta
+        self.budgets = []
+        epochs = min_epochs
+        while epochs < max_epochs:
+            self.budgets.append(epochs)
+            epochs *= eta
+        self.budgets.append(max_epochs)
+        self.rungs = [{} for _ in self.budgets]
+        self.promoted = [set() for _ in self.budgets]
+        self.started = 0
+
+    def next_job(self):
+        # promotions first, from the highest rung down
+        for rung in reversed(range(len(self.budgets) - 1)):
+            finished = self.rungs[rung]
+            top = sorted(finished, key=finished.get)[:len(finished) // self.eta]
+            for trial in top:
+                if trial not in self.promoted[rung] and math.isfinite(finished[trial]):
+                    self.promoted[rung].add(trial)
+                    return trial, rung + 1
+        if self.started < self.n_trials:
+            self.started += 1
+            return self.started - 1, 0
+        return None
+
+    def report(self, trial: int, rung: int, metric: float):
+        self.rungs[rung][trial] = metric
+
+    def best(self):
+        # (trial, rung, metric) of the best trial of the highest rung reached
+        for rung in reversed(range(len(self.budgets))):
+            finished = self.rungs[rung]
+            if finished:
+                trial = min(finished, key=finished.get)
+                return trial, rung, finished[trial]
+        return None
+
+
+def prepare_data(store_dir: str, data_dir: str, features_path: str, targets_path: str, seed: int = 42):
+
+    '''
+    prepare_data() method writes the training and validation splits of the feature store as
+    contiguous float32 .npy files in data_dir (training rows shuffled once), to be memory-mapped
+    by the workers. The store is built from the .csv files first if it does not exist.
+    '''
+
+    if not store_exists(store_dir):
+        X = pd.read_csv(features_path)
+        y = pd.read_csv(targets_path).iloc[:, 0]
+        write_feature_store(X, y, store_dir)
+
+    X, y, _ = load_feature_store(store_dir)
+    splits = load_splits(store_dir)
+    train_idx = np.random.default_rng(seed).permutation(splits["train"])
+
+    os.makedirs(data_dir, exist_ok=True)
+    for name, idx in (("train", train_idx), ("val", splits["val"])):
+        np.save(os.path.join(data_dir, f"X_{name}.npy"), np.ascontiguousarray(X[idx]))
+        np.save(os.path.join(data_dir, f"y_{name}.npy"), np.ascontiguousarray(y[idx]))
+
+
+def _init_worker(data_dir: str, threads: int):
+    # thread limits must be set before TensorFlow is imported in this process
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+    import tensorflow as tf
+    tf.config.set_visible_devices([], "GPU")
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    _worker["tf"] = tf
+    for name in ("train", "val"):
+        _worker[f"X_{name}"] = np.load(os.path.join(data_dir, f"X_{name}.npy"), mmap_mode="r")
+        _worker[f"y_{name}"] = np.load(os.path.join(data_dir, f"y_{name}.npy"), mmap_mode="r")
+
+
+def _dataset(name: str, batch_size: int, shuffle: bool, seed: int):
+    # batches are slices of the memory map; the batch order is reshuffled every epoch
+    tf = _worker["tf"]
+    X, y = _worker[f"X_{name}"], _worker[f"y_{name}"]
+    starts = np.arange(0, len(X), batch_size)
+    epoch = [0]
+
+    def batches():
+        order = np.random.default_rng([seed, epoch[0]]).permutation(starts) if shuffle else starts
+        epoch[0] += 1
+        for start in order:
+            yield np.asarray(X[start:start + batch_size]), np.asarray(y[start:start + batch_size])
+
+    signature = (tf.TensorSpec((None, X.shape[1]), tf.float32), tf.TensorSpec((None,), tf.float32))
+    return tf.data.Dataset.from_generator(batches, output_signature=signature).prefetch(tf.data.AUTOTUNE)
+
+
+def _run_job(job: dict):
+    # trains one trial from start_epoch to epochs (from its checkpoint if start_epoch > 0)
+    tf = _worker["tf"]
+    from src.models.model import PricePredictionModel
+
+    start = time.perf_counter()
+    model = PricePredictionModel(**job["model"])
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=job["train"]["learning_rate"]),
+                  loss="mse", metrics=["mae"])
+    model(np.asarray(_worker["X_train"][:1]))
+    if job["start_epoch"] > 0:
+        model.load_weights(job["checkpoint"])
+
+    seed = job["train"].get("shuffle_seed", 42) + job["trial"]
+    history = model.fit(
+        _dataset("train", job["train"]["batch_size"], shuffle=True, seed=seed),
+        validation_data=_dataset("val", job["train"]["batch_size"], shuffle=False, seed=seed),
+        initial_epoch=job["start_epoch"],
+        epochs=job["epochs"],
+        verbose=0
+    )
+    model.save_weights(job["checkpoint"])
+
+    values = history.history.get(job["metric"], [float("inf")])
+    return {
+        "trial": job["trial"],
+        "rung": job["rung"],
+        "epochs": job["epochs"],
+        "metric": job["metric"],
+        "value": float(np.nanmin(values)) if len(values) else float("inf"),
+        "last": {key: float(value[-1]) for key, value in history.history.items()},
+        "seconds": round(time.perf_counter() - start, 2),
+        "pid": os.getpid()
+    }
+
+
+def run_search(base_config: dict, search_config: dict, out_dir: str, workers: int = None,
+               threads_per_worker: int = None, store_dir: str = None,
+               features_path: str = "./data/features.csv", targets_path: str = "./data/targets.csv"):
+
+    '''
+    run_search() method runs the ASHA search and returns the best result
+    (a dictionary with the trial, its configuration and metric), or None if no job finished.
+
+    Args:
+
+        - base_config : config/config.json (parameters that are not searched)
+        - search_config : config/search.json ("search" settings and "space")
+        - out_dir : search directory (results.jsonl, best.json, checkpoints/, data/)
+        - workers : number of worker processes, default: cores // threads_per_worker
+        - threads_per_worker : TensorFlow threads per worker process
+        - store_dir : feature store directory, default: base_config["data"]["store_dir"]
+    '''
+
+    settings = search_config["search"]
+    threads = threads_per_worker or settings.get("threads_per_worker", 1)
+    workers = workers or settings.get("workers") or max(1, (os.cpu_count() or 1) // threads)
+    store_dir = store_dir or base_config.get("data", {}).get("store_dir", "./data/store")
+    metric = settings.get("metric", "val_mae")
+
+    os.makedirs(os.path.join(out_dir, "checkpoints"), exist_ok=True)
+    data_dir = os.path.join(out_dir, "data")
+    prepare_data(store_dir, data_dir, features_path, targets_path, seed=settings.get("seed", 42))
+
+    configs = sample_configs(search_config["space"], settings["n_trials"], seed=settings.get("seed", 42))
+    scheduler = ASHAScheduler(settings["n_trials"], settings["min_epochs"], settings["max_epochs"], settings["eta"])
+
+    def make_job(trial, rung):
+        model = {**base_config["model"], **{k: v for k, v in configs[trial].items() if k in base_config["model"]}}
+        train = {**base_config["train"], **{k: v for k, v in configs[trial].items() if k not in base_config["model"]}}
+        return {"trial": trial, "rung": rung, "model": model, "train": train, "metric": metric,
+                "start_epoch": scheduler.budgets[rung - 1] if rung > 0 else 0,
+                "epochs": scheduler.budgets[rung],
+                "checkpoint": os.path.join(out_dir, "checkpoints", f"trial-{trial}")}
+
+    results_path = os.path.join(out_dir, "results.jsonl")
+    print(f"{settings['n_trials']} trials, rungs (epochs) {scheduler.budgets}, "
+          f"{workers} workers x {threads} threads -> {out_dir}")
+
+    # spawn: every worker imports TensorFlow itself, after its thread limits are set
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(data_dir, threads)) as executor, open(results_path, "a") as results:
+        running = {}
+        while True:
+            while len(running) < workers:
+                next_job = scheduler.next_job()
+                if next_job is None:
+                    break
+                job = make_job(*next_job)
+                running[executor.submit(_run_job, job)] = job
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"trial": job["trial"], "rung": job["rung"], "epochs": job["epochs"],
+                              "metric": metric, "value": float("inf"), "error": str(e)}
+                scheduler.report(result["trial"], result["rung"], result["value"])
+                record = {**result, "model": job["model"], "train": job["train"]}
+                results.write(json.dumps(record) + "\n")
+                results.flush()
+                print(f"trial {result['trial']:3d} rung {result['rung']} ({result['epochs']} epochs): "
+                      f"{metric} {result['value']:.4f}" + (f" [error: {result['error']}]" if "error" in result else ""))
+
+    best = scheduler.best()
+    if best is None:
+        return None
+    trial, rung, value = best
+    job = make_job(trial, rung)
+    best_config = {"train": job["train"], "data": base_config.get("data", {}), "model": job["model"]}
+    with open(os.path.join(out_dir, "best.json"), "w") as file:
+        json.dump(best_config, file, indent=2)
+
+    return {"trial": trial, "rung": rung, "epochs": job["epochs"], metric: value, "config": best_config}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel ASHA hyperparameter search for PricePredictionModel.")
+    parser.add_argument("--config", default="./config/search.json", help="Search space and ASHA settings")
+    parser.add_argument("--base-config", default="./config/config.json", help="Parameters that are not searched")
+    parser.add_argument("--out", default=None, help="Search directory, default: ./experiments/search-<timestamp>")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, default: cores // threads")
+    parser.add_argument("--threads-per-worker", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.base_config, "r") as file:
+        base_config = json.load(file)
+    with open(args.config, "r") as file:
+        search_config = json.load(file)
+
+    out_dir = args.out or f"./experiments/search-{time.strftime('%Y%m%d-%H%M%S')}"
+    best = run_search(base_config, search_config, out_dir, args.workers, args.threads_per_worker)
+    print(json.dumps(best, indent=2))
+
+
+if __name__ == "__main__":
+    main()
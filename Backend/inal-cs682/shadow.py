@@ -0,0 +1,153 @@
+import os
+import struct
+import hashlib
+import argparse
+import threading
+import numpy as np
+
+'''
+Champion/challenger (shadow) scoring for the price API.
+
+Set CHALLENGER_MODEL to a version of the price model (e.g. 3) or its saved model directory
+(e.g. ./experiments/model-3) to score every request with it as well. Scoring goes through the
+shared model registry's shadow path (Backend/model/registry.py, ModelRegistry.predict(shadow=...)):
+the challenger runs in a background thread after the champion's prediction is computed, so it adds
+no latency to the request and its failures never reach the response; when more than
+MODEL_REGISTRY_SHADOW_MAX_PENDING requests are waiting, new requests are not shadowed (counted as
+dropped) instead of queueing up.
+
+Paired predictions are appended to a binary log of fixed-size little-endian records (RECORD_DTYPE):
+timestamp, request hash, champion prediction, challenger prediction, challenger latency in ms.
+Read it back with read_log() or summarize it with: python3 shadow.py --log ./experiments/shadow-model-3.bin
+'''
+
+CHALLENGER_MODEL = os.environ.get("CHALLENGER_MODEL")
+SHADOW_LOG = os.environ.get("SHADOW_LOG")
+
+RECORD = struct.Struct("<dQddf")
+RECORD_DTYPE = np.dtype([("timestamp", "<f8"), ("request", "<u8"), ("champion", "<f8"),
+                         ("challenger", "<f8"), ("latency_ms", "<f4")])
+
+
+def default_log_path(challenger_version):
+    return f"./experiments/shadow-model-{challenger_version}.bin"
+
+
+def request_hash(X):
+    """
+    64-bit hash of the model input, to pair log records with requests (identical inputs, identical hash).
+    """
+    values = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+    return int.from_bytes(hashlib.blake2b(values.tobytes(), digest_size=8).digest(), "little")
+
+
+def challenger_version():
+    """
+    Registry version of the challenger (CHALLENGER_MODEL=3 or ./experiments/model-3 -> "3"), None if not set.
+    """
+    if not CHALLENGER_MODEL:
+        return None
+    from model.registry import version_from_path
+    return version_from_path(os.path.normpath(CHALLENGER_MODEL))
+
+
+class ShadowLog:
+    """
+    Registry shadow sink appending one record per scored row to a binary log.
+
+    Args:
+        log_path (str): Binary log file (appended to); its directory is created if needed
+        model_name (str): Registry model whose shadow predictions are logged
+    """
+
+    def __init__(self, log_path, model_name="price"):
+        self.log_path = log_path
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        # opened by the shadow thread on the first record, so a bad log path never reaches the request
+        self._log = None
+
+    def __call__(self, entry, X, champion, challenger):
+        if entry["model"] != self.model_name:
+            return
+        values = np.asarray(X, dtype=np.float32).reshape(len(champion), -1)
+        records = b"".join(RECORD.pack(entry["timestamp"], request_hash(values[i:i + 1]), float(champion[i]),
+                                       float(challenger[i]), entry["seconds"] * 1000)
+                           for i in range(len(champion)))
+        with self._lock:
+            if self._log is None:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                self._log = open(self.log_path, "ab", buffering=0)
+            self._log.write(records)
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+
+_logs = {}
+_lock = threading.Lock()
+
+
+def install_shadow_log(registry):
+    """
+    Registers the challenger's ShadowLog with the registry (once per registry) and returns it.
+    """
+    with _lock:
+        log = _logs.get(id(registry))
+        if log is None:
+            log = _logs[id(registry)] = ShadowLog(SHADOW_LOG or default_log_path(challenger_version()))
+            registry.add_shadow_sink(log)
+        return log
+
+
+def shadow_status(registry):
+    """
+    Challenger, log path and the registry's shadow counters, None when no challenger is configured.
+    """
+    version = challenger_version()
+    if version is None:
+        return None
+    log = _logs.get(id(registry))
+    return {"challenger": version, "log": log.log_path if log is not None else None, **registry.shadow_stats}
+
+
+def read_log(path):
+    """
+    Read a shadow log into a numpy structured array (fields of RECORD_DTYPE). A partially written
+    last record is ignored.
+    """
+    n_records = os.path.getsize(path) // RECORD_DTYPE.itemsize
+    return np.fromfile(path, dtype=RECORD_DTYPE, count=n_records)
+
+
+def summarize(records):
+    """
+    Champion vs challenger statistics of a shadow log.
+    """
+    if len(records) == 0:
+        return {"requests": 0}
+    diff = records["challenger"] - records["champion"]
+    return {
+        "requests": int(len(records)),
+        "mean_diff": round(float(np.mean(diff)), 2),
+        "mean_abs_diff": round(float(np.mean(np.abs(diff))), 2),
+        "mean_abs_pct_diff": round(float(np.mean(np.abs(diff) / np.maximum(np.abs(records["champion"]), 1e-9))) * 100, 2),
+        "challenger_latency_ms_p50": round(float(np.percentile(records["latency_ms"], 50)), 2),
+        "challenger_latency_ms_p95": round(float(np.percentile(records["latency_ms"], 95)), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a champion/challenger shadow log.")
+    parser.add_argument("--log", required=True, help="Binary shadow log")
+    args = parser.parse_args()
+
+    for key, value in summarize(read_log(args.log)).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
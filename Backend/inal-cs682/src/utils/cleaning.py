@@ -0,0 +1,310 @@
+# Written by Inal Mashukov
+# for CS 682
+# University of Massachusetts Boston
+
+import os
+import re
+import glob
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from preprocess import TRAIN_COLUMNS
+from src.utils.ingest import resolve_columns
+
+'''
+Streaming cleaning pipeline for the MLS house-price exports (used by miscellaneous/data-cleaning.py).
+
+Each export is read in chunks, keeping only the columns the model uses (usecols) with explicit
+dtypes, and every chunk is filtered and encoded on its own and appended to the output file.
+Peak memory is therefore bounded by the chunk size, not by the combined size of the exports.
+Several exports can be cleaned at the same time in a process pool (one export per worker).
+
+The IQR outlier filter computes the quartiles of all continuous columns in one vectorized pass.
+It supports the original sequential semantics (each column's quartiles are computed on the rows
+that survived the previous columns, so the result depends on column order) and a simultaneous
+mode (all bounds computed on the same rows and applied as one combined mask). For chunked input
+the simultaneous bounds can be estimated from a bounded-size random sample of the rows.
+'''
+
+TARGET_COLUMN = "LIST_PRICE"
+
+# raw columns kept from the exports
+RAW_COLUMNS = [
+    "LIST_PRICE", "NO_BEDROOMS", "NO_FULL_BATHS", "NO_HALF_BATHS",
+    "TOTAL_BATHS", "SQUARE_FEET", "AboveGradeFinishedArea",
+    "SQUARE_FEET_INCL_BASE", "LIST_PRICE_PER_SQFT", "PRICE_PER_SQFT",
+    "PROP_TYPE", "YEAR_BUILT", "TOTAL_PARKING_SF", "COUNTY",
+    "TAXES", "BASEMENT", "FIRE_PLACES", "ASSESSMENTS"
+]
+
+BINARY_COLUMNS = ["SQUARE_FEET_INCL_BASE", "BASEMENT"]
+CATEGORICAL_COLUMNS = ["PROP_TYPE", "COUNTY"]
+
+RAW_DTYPES = {col: ("string" if col in BINARY_COLUMNS + CATEGORICAL_COLUMNS else "float64")
+              for col in RAW_COLUMNS}
+
+# encoded output columns: target + model features in training order
+OUTPUT_COLUMNS = [TARGET_COLUMN] + TRAIN_COLUMNS
+
+# columns filtered for outliers (IQR rule), in the order used by the sequential mode
+CONTINUOUS_COLUMNS = [
+    'NO_BEDROOMS', 'NO_FULL_BATHS', 'NO_HALF_BATHS', 'TOTAL_BATHS',
+    'SQUARE_FEET', 'AboveGradeFinishedArea', 'SQUARE_FEET_INCL_BASE',
+    'LIST_PRICE_PER_SQFT', 'PRICE_PER_SQFT', 'YEAR_BUILT', 'TOTAL_PARKING_SF',
+    'TAXES', 'BASEMENT', 'FIRE_PLACES', 'ASSESSMENTS'
+]
+
+OUTLIER_MODES = ("sequential", "simultaneous")
+
+
+def find_exports(directory: str = ".", pattern: str = "house-prices*.csv"):
+    '''
+    find_exports() method lists the MLS exports in directory, in numeric order
+    (house-prices1.csv, house-prices2.csv, ..., house-prices10.csv).
+    '''
+    def export_number(path):
+        numbers = re.findall(r"\d+", os.path.basename(path))
+        return int(numbers[-1]) if numbers else -1
+
+    return sorted(glob.glob(os.path.join(directory, pattern)), key=export_number)
+
+
+def encode_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+
+    '''
+    encode_chunk() method filters and encodes one chunk of raw export rows:
+
+        1. drop rows with a missing value in any kept column
+        2. Yes/No -> 1/0 for the binary columns
+        3. one-hot encode PROP_TYPE and COUNTY against the training categories (TRAIN_COLUMNS),
+           so every chunk has the same columns; unseen categories are all zeros, as in
+           preprocess_single_input() at inference time
+
+    returns the encoded chunk with OUTPUT_COLUMNS as float
+    '''
+
+    df = chunk[RAW_COLUMNS].dropna()
+
+    for col in BINARY_COLUMNS:
+        df[col] = df[col].map({"Yes": 1, "No": 0}).astype(int)
+
+    df = pd.get_dummies(df, columns=CATEGORICAL_COLUMNS, dtype=int)
+    df = df.reindex(columns=OUTPUT_COLUMNS, fill_value=0)
+
+    return df.astype(float)
+
+
+def clean_export(path: str, output_path: str, chunksize: int = 100_000):
+
+    '''
+    clean_export() method runs encode_chunk() over one export chunk by chunk and writes the
+    encoded rows to output_path (.csv, with header). Column names in the export are matched
+    on their normalized form (see src/utils/ingest.py).
+
+    returns the number of rows written
+    '''
+
+    mapping = resolve_columns(path, RAW_COLUMNS)
+    dtypes = {raw: RAW_DTYPES[name] for raw, name in mapping.items()}
+
+    n_rows = 0
+    header = True
+    with open(output_path, "w", newline="") as output:
+        for chunk in pd.read_csv(path, usecols=list(mapping), dtype=dtypes, chunksize=chunksize):
+            encoded = encode_chunk(chunk.rename(columns=mapping))
+            encoded.to_csv(output, header=header, index=False)
+            header = False
+            n_rows += len(encoded)
+
+    if header:
+        # no rows at all: still write the header so the file can be read back
+        pd.DataFrame(columns=OUTPUT_COLUMNS).to_csv(output_path, index=False)
+
+    return n_rows
+
+
+def _clean_export_task(task):
+    # module-level function so it can be sent to the worker processes
+    return clean_export(*task)
+
+
+def stream_clean_exports(paths, output_path: str, chunksize: int = 100_000, workers: int = 1):
+
+    '''
+    stream_clean_exports() method runs clean_export() over all exports and writes the encoded rows,
+    in the order of paths, to output_path (.csv, header written once).
+
+    Args:
+
+        - paths : list of export .csv files
+        - output_path : encoded output .csv file (overwritten)
+        - chunksize : number of raw rows per chunk, default: 100,000
+        - workers : number of worker processes cleaning exports in parallel (one export each),
+                    default: 1 (serial). Peak memory is about workers * chunksize rows.
+
+    returns the number of rows written
+    '''
+
+    paths = list(paths)
+    part_paths = [f"{output_path}.part{i}" for i in range(len(paths))]
+    tasks = [(path, part_path, chunksize) for path, part_path in zip(paths, part_paths)]
+
+    if workers <= 1:
+        counts = [_clean_export_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = list(executor.map(_clean_export_task, tasks))
+
+    # concatenate the parts, keeping the header of the first one only
+    with open(output_path, "w", newline="") as output:
+        if not part_paths:
+            output.write(",".join(OUTPUT_COLUMNS) + "\n")
+        for i, part_path in enumerate(part_paths):
+            with open(part_path, "r", newline="") as part:
+                header = part.readline()
+                if i == 0:
+                    output.write(header)
+                shutil.copyfileobj(part, output)
+            os.remove(part_path)
+
+    return sum(counts)
+
+
+def iqr_bounds(values: np.ndarray, k: float = 1.5):
+
+    '''
+    iqr_bounds() method computes the IQR outlier bounds of every column of values in one pass.
+
+    Args:
+
+        - values : (n_rows, n_columns) array
+        - k : IQR multiplier, default: 1.5
+
+    returns lower, upper arrays of shape (n_columns,): Q1 - k * IQR, Q3 + k * IQR
+    '''
+
+    # same (linear) interpolation as pandas' quantile()
+    q1, q3 = np.quantile(values, [0.25, 0.75], axis=0)
+    iqr = q3 - q1
+    return q1 - k * iqr, q3 + k * iqr
+
+
+def outlier_mask(df: pd.DataFrame, columns=CONTINUOUS_COLUMNS, mode: str = "sequential", k: float = 1.5):
+
+    '''
+    outlier_mask() method returns the boolean mask of the rows of df kept by the IQR filter.
+
+    Args:
+
+        - df : encoded data
+        - columns : columns to filter on, default: CONTINUOUS_COLUMNS
+        - mode : "sequential" (original semantics: the quartiles of each column are computed on the
+                 rows kept by the previous columns) or "simultaneous" (all quartiles computed on df,
+                 one combined mask, independent of column order)
+        - k : IQR multiplier, default: 1.5
+
+    returns a boolean numpy array of length len(df)
+    '''
+
+    if mode not in OUTLIER_MODES:
+        raise ValueError(f"mode must be one of {OUTLIER_MODES}, got {mode!r}")
+
+    values = df[columns].to_numpy(dtype=float)
+
+    if mode == "simultaneous":
+        lower, upper = iqr_bounds(values, k)
+        return ((values >= lower) & (values <= upper)).all(axis=1)
+
+    # sequential: no intermediate frame copies, only a shrinking boolean mask
+    keep = np.ones(len(values), dtype=bool)
+    for j in range(values.shape[1]):
+        column = values[:, j]
+        if not keep.any():
+            break
+        lower, upper = iqr_bounds(column[keep], k)
+        keep &= (column >= lower) & (column <= upper)
+
+    return keep
+
+
+def filter_outliers(df: pd.DataFrame, columns=CONTINUOUS_COLUMNS, mode: str = "sequential", k: float = 1.5):
+    '''
+    filter_outliers() method applies the IQR filter (see outlier_mask()) and returns the kept rows of df.
+    '''
+    return df[outlier_mask(df, columns, mode, k)]
+
+
+class ReservoirQuantiles:
+
+    '''
+    Approximate quantiles of chunked input from a uniform random sample of bounded size
+    (reservoir sampling). Memory is capacity * n_columns values, whatever the number of rows;
+    the rank error of a quantile is about 1 / sqrt(capacity) (~0.3% for the default capacity).
+
+    Args:
+
+        - n_columns : number of columns sampled
+        - capacity : maximum number of sampled rows, default: 100,000
+        - seed : sampling seed, default: 42
+    '''
+
+    def __init__(self, n_columns: int, capacity: int = 100_000, seed: int = 42):
+        self.capacity = capacity
+        self.sample = np.empty((capacity, n_columns), dtype=float)
+        self.n_seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        '''
+        update() method adds the rows of a chunk to the sample.
+        '''
+        values = np.asarray(values, dtype=float)
+
+        # fill the reservoir first
+        n_fill = min(max(self.capacity - self.n_seen, 0), len(values))
+        self.sample[self.n_seen:self.n_seen + n_fill] = values[:n_fill]
+
+        # then the row seen at position t replaces a random slot with probability capacity / (t + 1)
+        positions = np.arange(self.n_seen + n_fill, self.n_seen + len(values))
+        slots = (self.rng.random(len(positions)) * (positions + 1)).astype(np.int64)
+        replace = slots < self.capacity
+        self.sample[slots[replace]] = values[n_fill:][replace]
+
+        self.n_seen += len(values)
+
+    def iqr_bounds(self, k: float = 1.5):
+        '''
+        iqr_bounds() method returns the IQR bounds (see iqr_bounds()) estimated from the sample.
+        '''
+        return iqr_bounds(self.sample[:min(self.n_seen, self.capacity)], k)
+
+
+def stream_filter_outliers(input_path: str, output_path: str, columns=CONTINUOUS_COLUMNS,
+                           k: float = 1.5, chunksize: int = 100_000, capacity: int = 100_000):
+
+    '''
+    stream_filter_outliers() method applies the simultaneous IQR filter to an encoded .csv file
+    chunk by chunk: a first pass estimates the bounds with ReservoirQuantiles (exact while the file
+    has at most `capacity` rows), a second pass writes the rows within all bounds to output_path.
+
+    returns the number of rows written
+    '''
+
+    sketch = ReservoirQuantiles(len(columns), capacity=capacity)
+    for chunk in pd.read_csv(input_path, usecols=columns, dtype=float, chunksize=chunksize):
+        sketch.update(chunk[columns].to_numpy())
+
+    lower, upper = sketch.iqr_bounds(k)
+
+    n_rows = 0
+    header = True
+    with open(output_path, "w", newline="") as output:
+        for chunk in pd.read_csv(input_path, dtype=float, chunksize=chunksize):
+            values = chunk[columns].to_numpy()
+            kept = chunk[((values >= lower) & (values <= upper)).all(axis=1)]
+            kept.to_csv(output, header=header, index=False)
+            header = False
+            n_rows += len(kept)
+
+    return n_rows
@@ -4,7 +4,9 @@
 
 import pandas as pd
 import numpy as np
+import tensorflow as tf
 from sklearn.model_selection import train_test_split
+from src.utils.feature_store import load_feature_store, load_splits
 
 def load_data(features_path: str, targets_path: str,
               test_size: float = 0.2, val_size: float = 0.2):
@@ -42,3 +44,75 @@ def load_data(features_path: str, targets_path: str,
     print("*************************************************** \n")
     
     return X_train, X_val, X_test, y_train, y_val, y_test
+
+
+def load_data_from_store(store_dir: str):
+
+    '''
+    load_data_from_store() method loads data from a binary feature store (see src/utils/feature_store.py)
+    instead of the .csv files. The store is memory-mapped, so there is no CSV parsing at start-up,
+    and the train/val/test split is read from the index arrays persisted with the store
+    (same split as load_data(), computed once at cleaning time) instead of being recomputed.
+
+    Args:
+
+        - store_dir : path to the feature store directory
+
+    returns X_train, X_val, X_test, y_train, y_val, y_test (float32 arrays)
+    '''
+
+    X, y, _ = load_feature_store(store_dir)
+    splits = load_splits(store_dir)
+    train_idx, val_idx, test_idx = splits["train"], splits["val"], splits["test"]
+
+    # read each split from the memory map once
+    X_train, X_val, X_test = X[train_idx], X[val_idx], X[test_idx]
+    y_train, y_val, y_test = y[train_idx], y[val_idx], y[test_idx]
+
+    print("********************* SHAPES ********************** \n")
+    print(X_train.shape, X_val.shape, X_test.shape, y_train.shape, y_val.shape, y_test.shape)
+    print("*************************************************** \n")
+
+    return X_train, X_val, X_test, y_train, y_val, y_test
+
+
+def make_dataset(X, y, batch_size: int = 32, shuffle: bool = False,
+                 seed: int = 42, cache: bool = True):
+
+    '''
+    make_dataset() method wraps a feature set X and a target set y into a tf.data pipeline.
+
+    The pandas frames are converted to float32 tensors exactly once, so model.fit() does not
+    re-convert them on every epoch. The pipeline is cached in memory after the first pass,
+    shuffled every epoch with a fixed seed (training set only), batched, and prefetched with
+    AUTOTUNE so the next batch is prepared while the current one is being computed.
+
+    Args:
+
+        - X : features (DataFrame or array)
+        - y : targets (Series or array)
+        - batch_size : number of samples per batch, default: 32
+        - shuffle : reshuffle the samples every epoch (use for the training set only), default: False
+        - seed : shuffling seed, default: 42
+        - cache : keep the converted tensors in memory after the first epoch, default: True
+
+    returns a batched and prefetched tf.data.Dataset of (features, target) pairs
+    '''
+
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32)
+
+    dataset = tf.data.Dataset.from_tensor_slices((X, y))
+
+    if cache:
+        dataset = dataset.cache()
+
+    if shuffle:
+        # the whole set fits in the buffer, so this is a full (uniform) shuffle
+        dataset = dataset.shuffle(buffer_size=len(X), seed=seed,
+                                  reshuffle_each_iteration=True)
+
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.prefetch(tf.data.AUTOTUNE)
+
+    return dataset
@@ -0,0 +1,180 @@
+# Written by Inal Mashukov
+# for CS 682
+# University of Massachusetts Boston
+
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from preprocess import TRAIN_COLUMNS
+
+'''
+Binary feature store for the cleaned training data.
+
+The cleaned feature matrix X and the target vector y are stored as float32 .npy files,
+which are memory-mapped on load (no CSV parsing, and only the rows that are actually
+indexed are read from disk). A schema.json sidecar records the column names (TRAIN_COLUMNS),
+the number of rows and the dtype, so the loaders can check the store matches the model input.
+
+The train/val/test split is computed once when the store is written and saved as row index
+arrays (splits.npz), so every consumer loads exactly the same split instead of re-running
+train_test_split (whose output may change between sklearn versions).
+
+Layout of a store directory:
+
+    store_dir/
+    ├── features.npy   (n_rows, n_features) float32
+    ├── targets.npy    (n_rows,) float32
+    ├── splits.npz     train / val / test row indices (int64)
+    └── schema.json
+
+Build a store from the existing CSV files (run from the inal-cs682 directory):
+    python3 -m src.utils.feature_store --features ./data/features.csv --targets ./data/targets.csv --out ./data/store
+'''
+
+FEATURES_FILE = "features.npy"
+TARGETS_FILE = "targets.npy"
+SCHEMA_FILE = "schema.json"
+SPLITS_FILE = "splits.npz"
+
+
+def store_exists(store_dir: str) -> bool:
+    '''
+    store_exists() method checks whether store_dir contains a complete feature store.
+    '''
+    return all(os.path.exists(os.path.join(store_dir, name))
+               for name in (FEATURES_FILE, TARGETS_FILE, SCHEMA_FILE, SPLITS_FILE))
+
+
+def split_positions(n_rows: int, test_size: float = 0.2, val_size: float = 0.2, seed: int = 42):
+
+    '''
+    split_positions() method computes the train/val/test split of n_rows rows.
+    This is the split load_data() has always used (test split first, then validation split
+    out of the remaining training rows, both with random_state=42), expressed as row indices.
+
+    returns a dictionary {"train": indices, "val": indices, "test": indices}
+    '''
+
+    positions = np.arange(n_rows)
+    train_idx, test_idx = train_test_split(positions, test_size=test_size, random_state=seed)
+    train_idx, val_idx = train_test_split(train_idx, test_size=val_size, random_state=seed)
+
+    return {"train": train_idx, "val": val_idx, "test": test_idx}
+
+
+def write_feature_store(X: pd.DataFrame, y, store_dir: str,
+                        test_size: float = 0.2, val_size: float = 0.2, seed: int = 42):
+
+    '''
+    write_feature_store() method writes the cleaned features X, targets y and the
+    train/val/test split indices to store_dir.
+
+    Args:
+
+        - X : cleaned features, columns are reordered to TRAIN_COLUMNS
+              (one-hot columns that are missing from X are filled with 0)
+        - y : targets (Series or array), same number of rows as X
+        - store_dir : output directory, created if needed
+        - test_size : size of the testing set, default: 20%
+        - val_size : size of the validation set, default: 20%
+        - seed : split random state, default: 42
+
+    returns the schema dictionary written to schema.json
+    '''
+
+    missing = [col for col in X.columns if col not in TRAIN_COLUMNS]
+    if missing:
+        raise ValueError(f"Columns not in TRAIN_COLUMNS: {missing}")
+
+    X = X.reindex(columns=TRAIN_COLUMNS, fill_value=0)
+    features = np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+    targets = np.ascontiguousarray(np.asarray(y, dtype=np.float32).reshape(-1))
+
+    if features.shape[0] != targets.shape[0]:
+        raise ValueError(f"X has {features.shape[0]} rows but y has {targets.shape[0]}.")
+
+    os.makedirs(store_dir, exist_ok=True)
+    np.save(os.path.join(store_dir, FEATURES_FILE), features)
+    np.save(os.path.join(store_dir, TARGETS_FILE), targets)
+
+    splits = split_positions(features.shape[0], test_size=test_size, val_size=val_size, seed=seed)
+    np.savez(os.path.join(store_dir, SPLITS_FILE), **splits)
+
+    schema = {
+        "columns": TRAIN_COLUMNS,
+        "n_rows": int(features.shape[0]),
+        "dtype": "float32",
+        "splits": {
+            "file": SPLITS_FILE,
+            "test_size": test_size,
+            "val_size": val_size,
+            "seed": seed,
+            "sizes": {name: int(len(idx)) for name, idx in splits.items()}
+        }
+    }
+
+    with open(os.path.join(store_dir, SCHEMA_FILE), "w") as file:
+        json.dump(schema, file, indent=2)
+
+    return schema
+
+
+def load_feature_store(store_dir: str, mmap_mode: str = "r"):
+
+    '''
+    load_feature_store() method memory-maps the features and targets in store_dir.
+
+    Args:
+
+        - store_dir : directory written by write_feature_store()
+        - mmap_mode : numpy memory-map mode, default: "r" (read-only). None loads the arrays into memory.
+
+    returns X (n_rows, n_features), y (n_rows,), schema
+    '''
+
+    with open(os.path.join(store_dir, SCHEMA_FILE), "r") as file:
+        schema = json.load(file)
+
+    if schema["columns"] != TRAIN_COLUMNS:
+        raise ValueError(f"Feature store columns in {store_dir} do not match TRAIN_COLUMNS.")
+
+    X = np.load(os.path.join(store_dir, FEATURES_FILE), mmap_mode=mmap_mode)
+    y = np.load(os.path.join(store_dir, TARGETS_FILE), mmap_mode=mmap_mode)
+
+    if X.shape != (schema["n_rows"], len(schema["columns"])) or y.shape != (schema["n_rows"],):
+        raise ValueError(f"Feature store arrays in {store_dir} do not match schema.json.")
+
+    return X, y, schema
+
+
+def load_splits(store_dir: str):
+
+    '''
+    load_splits() method loads the persisted split indices of the store in store_dir.
+
+    returns a dictionary {"train": indices, "val": indices, "test": indices}
+    '''
+
+    with np.load(os.path.join(store_dir, SPLITS_FILE)) as splits:
+        return {name: splits[name] for name in ("train", "val", "test")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert features.csv/targets.csv into a binary feature store.")
+    parser.add_argument("--features", default="./data/features.csv", help="Path to the features .csv file")
+    parser.add_argument("--targets", default="./data/targets.csv", help="Path to the targets .csv file")
+    parser.add_argument("--out", default="./data/store", help="Output feature store directory")
+    args = parser.parse_args()
+
+    X = pd.read_csv(args.features)
+    y = pd.read_csv(args.targets).iloc[:, 0]
+
+    schema = write_feature_store(X, y, args.out)
+    print(f"Wrote {schema['n_rows']} rows x {len(schema['columns'])} features to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Written by Inal Mashukov
+# for CS 682
+# University of Massachusetts Boston
+
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+'''
+Parallel ingestion of MLS export files.
+
+Every export is parsed by a separate worker process, so several files are parsed at the same time
+on several cores. Column names are normalized the same way scoring.evaluation() does in katt-cs682
+(strip, upper case, spaces -> underscores), so exports with slightly different headers line up,
+and then mapped back to the names the caller asked for.
+
+Scaling check (run from the inal-cs682 directory):
+    python3 -m src.utils.ingest house-prices*.csv --workers 1 2 4 8 16
+'''
+
+
+def normalize_column(name) -> str:
+    '''
+    normalize_column() method normalizes a column name: " List Price " -> "LIST_PRICE".
+    '''
+    return str(name).strip().upper().replace(" ", "_")
+
+
+def resolve_columns(path: str, columns):
+
+    '''
+    resolve_columns() method matches the wanted columns against the header of the file at path,
+    comparing normalized names.
+
+    Args:
+
+        - path : .csv file
+        - columns : wanted column names
+
+    returns a dictionary {header name in the file: wanted name}
+    '''
+
+    wanted = {normalize_column(col): col for col in columns}
+    header = pd.read_csv(path, nrows=0).columns
+
+    found = {raw: wanted[normalize_column(raw)] for raw in header if normalize_column(raw) in wanted}
+    missing = set(columns) - set(found.values())
+    if missing:
+        raise ValueError(f"{path} is missing columns: {sorted(missing)}")
+
+    return found
+
+
+def read_export(path: str, columns=None, dtypes=None):
+
+    '''
+    read_export() method reads one export file.
+
+    Args:
+
+        - path : .csv file
+        - columns : columns to keep (matched on normalized names, returned with these names);
+                    None keeps all columns, with normalized names
+        - dtypes : optional {column: dtype} for the kept columns
+
+    returns a DataFrame
+    '''
+
+    if columns is None:
+        df = pd.read_csv(path, low_memory=False)
+        df.columns = [normalize_column(col) for col in df.columns]
+        return df
+
+    mapping = resolve_columns(path, columns)
+    raw_dtypes = {raw: dtypes[name] for raw, name in mapping.items() if dtypes and name in dtypes}
+
+    df = pd.read_csv(path, usecols=list(mapping), dtype=raw_dtypes or None)
+    return df.rename(columns=mapping)[list(columns)]
+
+
+def _read_export_task(task):
+    # module-level function so it can be sent to the worker processes
+    path, columns, dtypes = task
+    return read_export(path, columns, dtypes)
+
+
+def read_exports(paths, columns=None, dtypes=None, workers: int = None):
+
+    '''
+    read_exports() method reads several export files in parallel (one file per worker process)
+    and concatenates them in the order of paths.
+
+    Args:
+
+        - paths : list of .csv files
+        - columns, dtypes : see read_export()
+        - workers : number of worker processes, default: one per file up to the number of CPU cores;
+                    1 reads the files serially in this process
+
+    returns a DataFrame
+    '''
+
+    paths = list(paths)
+    if not paths:
+        return pd.DataFrame(columns=columns)
+
+    if workers is None:
+        workers = min(len(paths), os.cpu_count() or 1)
+
+    tasks = [(path, columns, dtypes) for path in paths]
+
+    if workers <= 1:
+        frames = [_read_export_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            frames = list(executor.map(_read_export_task, tasks))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time parallel ingestion of MLS exports for several worker counts.")
+    parser.add_argument("paths", nargs="+", help="Export .csv files")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Worker counts to time")
+    args = parser.parse_args()
+
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        df = read_exports(args.paths, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"workers={workers:>2}  rows={len(df)}  {elapsed:.2f}s  speedup={baseline / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,10 @@
 import tensorflow as tf 
 from tensorflow import keras 
 from src.models.model import PricePredictionModel 
-from src.utils.data_loader import load_data
+from src.utils.data_loader import load_data, load_data_from_store, make_dataset
+from src.utils.feature_store import store_exists
 import json
+import time
 
 
 def main():
@@ -32,8 +34,12 @@ def main():
     with open("./config/config.json", "r") as file:
         config = json.load(file)
 
-    # Load data
-    X_train, X_val, X_test, y_train, y_val, y_test = load_data(features_path, targets_path)
+    # Load data (from the binary feature store if it has been built, otherwise from the .csv files)
+    store_dir = config.get("data", {}).get("store_dir", "./data/store")
+    if store_exists(store_dir):
+        X_train, X_val, X_test, y_train, y_val, y_test = load_data_from_store(store_dir)
+    else:
+        X_train, X_val, X_test, y_train, y_val, y_test = load_data(features_path, targets_path)
 
     # Get model hyperparameters 
     model_config = config["model"]
@@ -70,32 +76,57 @@ def main():
     log_file.write(f"Training configuration:\n{train_config}\n")
     log_file.write("**********************************************************\n\n")
 
-    # Save logs to the file
+    # Save logs to the file (epoch_time is the wall-clock time of the epoch in seconds,
+    # used to compare the "pandas" and "tf.data" input pipelines)
     class LogToFileCallback(keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.epoch_start = time.perf_counter()
+
         def on_epoch_end(self, epoch, logs=None):
             logs = logs or {}
             log_file.write(f"Epoch {epoch+1}/{self.params['epochs']}\n")
             for key, value in logs.items():
                 log_file.write(f"{key}: {value}\n")
+            log_file.write(f"epoch_time: {time.perf_counter() - self.epoch_start:.4f}\n")
             log_file.write("\n")
 
     # Initialize custom callback
     log_to_file = LogToFileCallback()
 
     # Train the model
-    history = model.fit(
-        X_train, y_train,
-        validation_data=(X_val, y_val),
-        epochs=train_config["epochs"],
-        batch_size=train_config["batch_size"],
-        callbacks=[lr_scheduler, early_stopping, log_to_file]
-    )
+    # "tf.data": converts the frames to float32 tensors once, caches, shuffles (fixed seed), batches and prefetches
+    # "pandas": feeds the DataFrames to model.fit() directly (original behavior)
+    if train_config.get("pipeline", "pandas") == "tf.data":
+        batch_size = train_config["batch_size"]
+        train_ds = make_dataset(X_train, y_train, batch_size=batch_size, shuffle=True,
+                                seed=train_config.get("shuffle_seed", 42))
+        val_ds = make_dataset(X_val, y_val, batch_size=batch_size)
+        test_ds = make_dataset(X_test, y_test, batch_size=batch_size)
+
+        history = model.fit(
+            train_ds,
+            validation_data=val_ds,
+            epochs=train_config["epochs"],
+            callbacks=[lr_scheduler, early_stopping, log_to_file]
+        )
+    else:
+        history = model.fit(
+            X_train, y_train,
+            validation_data=(X_val, y_val),
+            epochs=train_config["epochs"],
+            batch_size=train_config["batch_size"],
+            callbacks=[lr_scheduler, early_stopping, log_to_file]
+        )
+        test_ds = None
 
     # Close the log file after training
     log_file.close()
 
     # Evaluation
-    test_loss, test_mae = model.evaluate(X_test, y_test)
+    if test_ds is not None:
+        test_loss, test_mae = model.evaluate(test_ds)
+    else:
+        test_loss, test_mae = model.evaluate(X_test, y_test)
     print(f"Test loss: {test_loss:.4f}, Test MAE: {test_mae:.4f}")
 
     # Save the model
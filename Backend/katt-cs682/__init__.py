@@ -5,12 +5,12 @@ from catboost import CatBoostRegressor
 from predict import predict_rent_for_address
 from optimization import rental_optimization_insight
 from scoring import evaluation
+from dataset import load_listings, DATA_PATH
 
 # === Main Run ===
 if __name__ == "__main__":
-    data_set = 'cleaned_data.csv'
-    df_all = pd.read_csv(data_set)
-    df_all["ADDRESS"] = df_all["ADDRESS"].astype(str).str.strip()
+    data_set = DATA_PATH
+    df_all = load_listings(data_set)
 
     model = CatBoostRegressor()
     model.load_model("rent_predictor_model.cbm")
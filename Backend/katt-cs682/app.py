@@ -1,22 +1,43 @@
+import os
+import sys
 from flask import Flask, request, render_template,jsonify
 import pandas as pd
-import re
-from catboost import CatBoostRegressor
 
-from predict import predict_rent_for_address
-from optimization import rental_optimization_insight
-from scoring import evaluation_insights
-from scoring import evaluation
+from predict import predict_rent_for_address, calibrated_intervals
+from optimization import rental_optimization_insight, rent_sweep
 from flask_cors import CORS
+from dataset import load_listings, ListingStore, DATA_PATH
+from explain import explain_addresses
+
+# shared modules under Backend/: the model registry serves the rent model, web the response middleware
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model.registry import get_registry
+from web import install, file_version
+from results import rent_insights, ResultStore, RESULTS_PATH
 
 app = Flask(__name__)
 CORS(app)
 # Load model and dataset once at startup
-df_all = pd.read_csv("cleaned_data.csv")
-df_all["ADDRESS"] = df_all["ADDRESS"].astype(str).str.strip()
+# the live dataset; listings can be added/updated at runtime with POST /api/listings
+store = ListingStore(load_listings(DATA_PATH))
+
+# model "rent" of the registry: rent_predictor_model.cbm by default, RENT_MODEL_VERSION selects another
+# version (e.g. rent_predictor_model.pkl)
+RENT_MODEL_VERSION = os.environ.get("RENT_MODEL_VERSION")
+registry = get_registry()
+MODEL_PATH = registry.artifact("rent", RENT_MODEL_VERSION).path
+model = registry.get("rent", RENT_MODEL_VERSION)
+
+# orjson + compression + ETags: cached responses stay valid until the model file, the data file
+# or the live dataset (POST /api/listings) changes
+MODEL_VERSION, DATA_VERSION = file_version(MODEL_PATH), file_version(DATA_PATH)
+install(app, lambda: f"{MODEL_VERSION}:{DATA_VERSION}:{store.version}")
+
+# prediction intervals (virtual ensembles), calibrated once on the listings held out of the model's training
+intervals = calibrated_intervals(model, MODEL_PATH)
 
-model = CatBoostRegressor()
-model.load_model("rent_predictor_model.cbm")
+# rent insights precomputed by the nightly job (python results.py); live computation when missing or stale
+results = ResultStore(RESULTS_PATH, f"{MODEL_VERSION}:{DATA_VERSION}")
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -27,13 +48,16 @@ def index():
     if request.method == "POST":
         address_input = request.form.get("ADDRESS", "").strip()
 
-        # Case-insensitive, partial match
-        matches = df_all[df_all["ADDRESS"].str.contains(address_input, case=False, na=False)]
+        # exact address from the store's index; otherwise a case-insensitive, partial match
+        df_all = store.df
+        matches = store.lookup(address_input)
+        if matches.empty:
+            matches = df_all[df_all["ADDRESS"].str.contains(address_input, case=False, na=False, regex=False)]
 
         if not matches.empty:
             selected_address = matches.iloc[0]["ADDRESS"]
-            result["prediction"] = predict_rent_for_address(selected_address, df_all, model)
-            result["optimization"] = rental_optimization_insight(selected_address, df_all, model)
+            result["prediction"] = predict_rent_for_address(selected_address, df_all, model, store=store)
+            result["optimization"] = rental_optimization_insight(selected_address, df_all, model, store=store, intervals=intervals)
             if len(matches) > 1:
                 suggestions = matches["ADDRESS"].tolist()
         else:
@@ -41,45 +65,90 @@ def index():
 
     return render_template("index.html", result=result, suggestions=suggestions)
 
-def parse_evaluation_string(evaluation_string):
-    result = {}
-    for line in evaluation_string.split('\n'):
-        if "Risk Score:" in line:
-            result["risk_score"] = float(re.findall(r"\d+\.\d+|\d+", line)[0])
-        elif "Disclosure Risk:" in line:
-            result["disclosure_risk"] = float(re.findall(r"\d+\.\d+|\d+", line)[0])
-        elif "Renovation Candidate:" in line:
-            result["renovation_candidate"] = "Yes" in line
-        elif "Fraud Flag:" in line:
-            result["fraud_flag"] = "Yes" in line
-        elif "Total Risk Score:" in line:
-            result["total_risk_score"] = float(re.findall(r"\d+\.\d+|\d+", line)[0])
-    return result
+def parse_comps_args(args):
+    # ?comps=zip (default)
+    # ?comps=geo[&lat=..&lon=..][&radius_km=..][&k=..] -> geospatial comps (geo.GeoCompsIndex)
+    # ?comps=similar[&k=..] -> most similar listings (optimization.CompsIndex)
+    mode = args.get("comps", "zip").lower()
+    if mode == "geo":
+        geo = {"radius_km": float(args.get("radius_km", 2.0)), "k": int(args.get("k", 20))}
+        if "lat" in args and "lon" in args:
+            geo["lat"], geo["lon"] = float(args["lat"]), float(args["lon"])
+        return {"geo": geo}
+    if mode == "similar":
+        return {"similar": {"k": int(args.get("k", 20))}}
+    return {}
 
 
 @app.route("/api/rent-insights/<address>", methods=["GET"])
-def rent_insights(address):
+def rent_insights_api(address):
     try:
-        predicted_rent = predict_rent_for_address(address,df_all, model)
-        optimal_rent = rental_optimization_insight(address,df_all, model)
-        insights = evaluation_insights(address)
-        raw_eval = evaluation("cleaned_data.csv", address)
-        parsed_eval = parse_evaluation_string(raw_eval)
-        return jsonify({
-            "predicted_rent": predicted_rent,
-            "optimal_rent": optimal_rent,
-            "median_rent": insights.get("median_rent"),
-            "diff_from_median": insights.get("difference_from_median"),
-            "likelihood": insights.get("likelihood"),
-            "num_comps": insights.get("num_comps"),
-            "risk_score": parsed_eval.get("risk_score"),
-            "disclosure_risk": parsed_eval.get("disclosure_risk"),
-            "renovation_candidate": parsed_eval.get("renovation_candidate"),
-            "fraud_flag": parsed_eval.get("fraud_flag"),
-            "total_risk_score": parsed_eval.get("total_risk_score")
-        })
+        comps = parse_comps_args(request.args)
+        # precomputed by the nightly job (results.py): one key lookup, already encoded
+        if not comps:
+            payload = results.get(address, store)
+            if payload is not None:
+                return app.response_class(payload, mimetype="application/json")
+        return jsonify(rent_insights(address, store, model, intervals, comps))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+
+@app.route("/api/listings", methods=["POST"])
+def add_listings():
+    """
+    Append or update listings (JSON object or list) in the live dataset, keyed on ADDRESS+ZIP_CODE.
+    ?append_only=true always appends (repeated keys are then flagged as duplicates).
+    """
+    try:
+        records = request.get_json()
+        if not records:
+            return jsonify({"error": "No listings provided"}), 400
+        append_only = request.args.get("append_only", "false").lower() == "true"
+        return jsonify(store.upsert(records, append_only=append_only))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/api/rent-sweep", methods=["POST"])
+def rent_sweep_api():
+    """
+    Predicted rent for every combination of the given parameter values, e.g.
+    {"address": "12 Main St", "grid": {"NO_BEDROOMS": [1, 2, 3], "PETS_ALLOWED_RN": ["Yes", "No"]}}
+    """
+    try:
+        query = request.get_json() or {}
+        return jsonify(rent_sweep(query.get("address", ""), store.df, model, query.get("grid", {}), store=store))
+    except KeyError as e:
+        return jsonify({"error": str(e)}), 404
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/explain/<address>", methods=["GET"])
+def explain_single(address):
+    # top-k SHAP contributions to the predicted rent of one listing (?k=5)
+    try:
+        result = explain_addresses([address], store.df, model, top_k=request.args.get("k", 5, type=int), store=store)
+        if not result["explanations"]:
+            return jsonify({"error": f"ADDRESS {address} not found."}), 404
+        return jsonify(result["explanations"][address])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/explain", methods=["POST"])
+def explain_batch():
+    # {"addresses": [...], "k": 5}: all listings explained in one batched call
+    try:
+        query = request.get_json() or {}
+        return jsonify(explain_addresses(query.get("addresses", []), store.df, model,
+                                         top_k=int(query.get("k", 5)), store=store))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 if __name__ == "__main__":
     app.run(debug=True)
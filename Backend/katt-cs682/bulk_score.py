@@ -0,0 +1,226 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor, Pool
+
+from predict import preprocess_for_model, calibrated_intervals, PredictionIntervals
+from optimization import price_position
+from scoring import assess_risk, calculate_disclosure_risk, is_renovation_candidate
+from fruad import detect_fraud
+from dataset import load_listings, normalize_columns, COMP_KEY_COLUMNS, DATA_PATH
+
+MODEL_PATH = "rent_predictor_model.cbm"
+ID_COLUMNS = ["LIST_NO", "ADDRESS", "ZIP_CODE"]
+SQFT_TOLERANCE = 0.2
+
+# --- Bulk Scoring CLI ---
+# python bulk_score.py --input cleaned_data.csv --output scores.parquet --workers 8
+#
+# Predicted rent, comps statistics, optimal rent (same rule as rental_optimization_insight, ZIP_CODE comps)
+# and the risk pipeline for every listing. The dataset is sent to each worker process once (initializer);
+# tasks are (start, stop) row ranges, so only row ranges and results cross process boundaries. Pass 1
+# predicts every listing with its prediction interval (comps need the predictions of other listings),
+# pass 2 scores the chunks, and the results are appended to the output file chunk by chunk, in input order.
+#
+# The intervals are calibrated once, as in app.py (predict.calibrated_intervals). When calibrated, their
+# half-width is the uncertainty band of LIKELIHOOD and OPTIMAL_RENT, otherwise the comps' standard deviation
+# is (rental_optimization_insight's rule), so both match /api/rent-insights and results.py.
+
+
+# --- Worker State (one copy per process) ---
+_df = None
+_predictions = None
+_bounds = None
+_model = None
+_intervals = None
+_buckets = None
+
+
+def _init_worker(df, model_path, scale, calibrated, predictions=None, bounds=None):
+    global _df, _predictions, _bounds, _model, _intervals, _buckets
+    _df, _predictions, _bounds = df, predictions, bounds
+    _model = CatBoostRegressor()
+    _model.load_model(model_path)
+    # the scale calibrated in the main process, so every worker produces the same intervals
+    _intervals = PredictionIntervals(_model)
+    _intervals.scale, _intervals.calibrated = scale, calibrated
+
+    # comps buckets: same COMP_KEY_COLUMNS, positions sorted by SQUARE_FEET (as get_similar_properties)
+    _buckets = {}
+    if predictions is not None:
+        sqft = pd.to_numeric(df["SQUARE_FEET"], errors="coerce").to_numpy(dtype=float)
+        for key, positions in df.groupby(COMP_KEY_COLUMNS).indices.items():
+            positions = positions[~np.isnan(sqft[positions])]
+            order = positions[np.argsort(sqft[positions], kind="stable")]
+            _buckets[key] = (sqft[order], predictions[order])
+
+
+def _predict_chunk(bounds):
+    start, stop = bounds
+    features, cat_cols = preprocess_for_model(_df.iloc[start:stop])
+    # one thread per worker process: the processes already use all cores
+    return np.column_stack(_intervals.predict(Pool(features, cat_features=cat_cols), thread_count=1))
+
+
+def _comps_stats(row, sqft):
+    bucket = _buckets.get(tuple(row[col] for col in COMP_KEY_COLUMNS))
+    if bucket is None or np.isnan(sqft):
+        return np.nan, np.nan, 0
+    bucket_sqft, bucket_rent = bucket
+    low = np.searchsorted(bucket_sqft, sqft * (1 - SQFT_TOLERANCE), side="left")
+    high = np.searchsorted(bucket_sqft, sqft * (1 + SQFT_TOLERANCE), side="right")
+    rents = bucket_rent[low:high]
+    if len(rents) == 0:
+        return np.nan, np.nan, 0
+    # sample std, like pandas' Series.std() (NaN for a single comp)
+    std = float(np.std(rents, ddof=1)) if len(rents) > 1 else np.nan
+    return float(np.median(rents)), std, len(rents)
+
+
+def _score_chunk(bounds):
+    start, stop = bounds
+    chunk = _df.iloc[start:stop]
+    predicted = _predictions[start:stop]
+    # rounded like PredictionIntervals.interval_for(), as the API does
+    lower, upper = (np.round(bound[start:stop], 2) for bound in _bounds)
+    sqft = pd.to_numeric(chunk["SQUARE_FEET"], errors="coerce").to_numpy(dtype=float)
+    # plain dicts: the scoring functions only use row.get(), and dicts are much cheaper than iterrows()
+    records = chunk.to_dict("records")
+
+    out = chunk[[col for col in ID_COLUMNS if col in chunk.columns]].copy()
+    out["PREDICTED_RENT"] = predicted.round(2)
+    out["RENT_LOWER"] = lower
+    out["RENT_UPPER"] = upper
+
+    calibrated = _intervals.calibrated or _intervals.alphas is not None
+    medians, stds, counts, likelihoods, optimal = [], [], [], [], []
+    for row, rent, row_sqft, half_width in zip(records, out["PREDICTED_RENT"], sqft, (upper - lower) / 2):
+        median_rent, std_rent, num_comps = _comps_stats(row, row_sqft)
+        medians.append(median_rent)
+        stds.append(std_rent)
+        counts.append(num_comps)
+        if num_comps:
+            # uncertainty band as in rental_optimization_insight: interval half-width if calibrated, else comps std
+            band = half_width if calibrated else std_rent
+            likelihood, _, optimal_rent = price_position(rent, median_rent, band)
+        else:
+            likelihood, optimal_rent = None, np.nan
+        likelihoods.append(likelihood)
+        optimal.append(optimal_rent)
+
+    out["COMPS_MEDIAN_RENT"] = np.round(medians, 2)
+    out["COMPS_STD_RENT"] = np.round(stds, 2)
+    out["NUM_COMPS"] = counts
+    out["LIKELIHOOD"] = likelihoods
+    out["OPTIMAL_RENT"] = np.round(optimal, 2)
+
+    # risk pipeline (scoring.run_risk_pipeline); fraud_flag is computed on the whole dataset beforehand
+    disclosures = chunk["DISCLOSURES"] if "DISCLOSURES" in chunk.columns else pd.Series("", index=chunk.index)
+    out["risk_score"] = [assess_risk(row) for row in records]
+    out["disclosure_risk"] = [calculate_disclosure_risk(text, row) for text, row in zip(disclosures, records)]
+    out["renovation_candidate"] = disclosures.apply(lambda x: is_renovation_candidate(str(x)))
+    out["fraud_flag"] = chunk["fraud_flag"].astype(bool)
+    out["total_risk_score"] = (out["risk_score"] + out["disclosure_risk"] + out["fraud_flag"].astype(float)).round(2)
+    return out
+
+
+# --- I/O ---
+def read_dataset(paths, workers=None) -> pd.DataFrame:
+    # CSV exports (parsed in parallel) or a columnar snapshot (.parquet)
+    if all(path.endswith(".parquet") for path in paths):
+        df = normalize_columns(pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True))
+        df["ADDRESS"] = df["ADDRESS"].astype(str).str.strip()
+        return df
+    return load_listings(paths, workers=workers)
+
+
+class ChunkWriter:
+    """
+    Appends result chunks to a Parquet file (one row group per chunk), or to a CSV file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+        self.header = True
+
+    def write(self, chunk: pd.DataFrame):
+        if self.path.endswith(".csv"):
+            chunk.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+            self.header = False
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def bulk_score(paths, output_path, model_path=MODEL_PATH, workers=None, chunksize=2000) -> dict:
+    workers = workers or os.cpu_count() or 1
+    timings = {}
+
+    start = time.perf_counter()
+    df = read_dataset(paths, workers=workers).reset_index(drop=True)
+    df["fraud_flag"] = detect_fraud(df)["fraud_flag"].to_numpy()
+    timings["read_seconds"] = round(time.perf_counter() - start, 2)
+
+    chunks = [(i, min(i + chunksize, len(df))) for i in range(0, len(df), chunksize)]
+
+    # prediction intervals calibrated like the API's (on the model's held-out listings)
+    start = time.perf_counter()
+    model = CatBoostRegressor()
+    model.load_model(model_path)
+    intervals = calibrated_intervals(model, model_path)
+    timings["calibrate_seconds"] = round(time.perf_counter() - start, 2)
+
+    # pass 1: predicted rent and prediction interval of every listing
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(df, model_path, intervals.scale, intervals.calibrated)) as executor:
+        results = np.concatenate(list(executor.map(_predict_chunk, chunks))) if chunks else np.empty((0, 3))
+    predictions, bounds = results[:, 0], (results[:, 1], results[:, 2])
+    timings["predict_seconds"] = round(time.perf_counter() - start, 2)
+
+    # pass 2: comps, optimal rent and risk per chunk, written in order as they complete
+    start = time.perf_counter()
+    writer = ChunkWriter(output_path)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(df, model_path, intervals.scale, intervals.calibrated, predictions,
+                                           bounds)) as executor:
+            for result in executor.map(_score_chunk, chunks):
+                writer.write(result)
+    finally:
+        writer.close()
+    timings["score_seconds"] = round(time.perf_counter() - start, 2)
+
+    total = sum(timings.values())
+    return {"rows": len(df), "workers": workers, "intervals_calibrated": intervals.calibrated, **timings,
+            "rows_per_second": round(len(df) / total, 1) if total else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every listing: predicted/optimal rent, comps and risk.")
+    parser.add_argument("--input", nargs="+", default=[DATA_PATH], help="Listing CSV file(s) or .parquet snapshot(s)")
+    parser.add_argument("--output", default="scores.parquet", help="Output .parquet (or .csv) file")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=2000, help="Listings per task")
+    args = parser.parse_args()
+
+    summary = bulk_score(args.input, args.output, args.model, args.workers, args.chunksize)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from catboost import Pool
+
+from predict import preprocess_for_model
+from market import MarketStats, MARKET_KEY_COLUMNS
+from geo import GeoCompsIndex
+
+DATA_PATH = "cleaned_data.csv"
+
+# comps are listings with the same values in these columns (see optimization.get_similar_properties)
+COMP_KEY_COLUMNS = ["ZIP_CODE", "NO_BEDROOMS", "TOTAL_BATHS", "PROP_TYPE"]
+
+
+# --- Column Normalization (same as scoring.evaluation) ---
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = df.columns.str.strip().str.upper().str.replace(" ", "_")
+    return df
+
+
+# --- Single File ---
+def read_listings(path: str) -> pd.DataFrame:
+    df = normalize_columns(pd.read_csv(path, low_memory=False))
+    df["ADDRESS"] = df["ADDRESS"].astype(str).str.strip()
+    return df
+
+
+# --- One or More Files (parsed in parallel, one file per worker process) ---
+def load_listings(paths=DATA_PATH, workers: int = None) -> pd.DataFrame:
+    if isinstance(paths, str):
+        paths = [paths]
+    paths = list(paths)
+
+    if workers is None:
+        workers = min(len(paths), os.cpu_count() or 1)
+
+    if workers <= 1 or len(paths) == 1:
+        frames = [read_listings(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            frames = list(executor.map(read_listings, paths))
+
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+# --- Listing Key (same key as fruad.detect_fraud) ---
+def listing_key(address, zip_code) -> str:
+    return str(address).strip().upper() + "::" + str(zip_code).strip()
+
+
+# --- Live Dataset with Incremental Updates ---
+class ListingStore:
+    """
+    In-memory listing dataset with the indexes the API needs, updated incrementally:
+    - address index:   ADDRESS -> row labels
+    - comps buckets:   (ZIP_CODE, NO_BEDROOMS, TOTAL_BATHS, PROP_TYPE) -> row labels
+    - duplicate counts per ADDRESS+ZIP_CODE key (fraud flag)
+    - cached rent predictions per row
+    - market statistics per (ZIP_CODE, PROP_TYPE) (market.MarketStats)
+    - indexes that cannot be updated in place (geo.GeoCompsIndex, optimization.CompsIndex),
+      rebuilt lazily on first use after an update (derived_index)
+    - the listing keys, comps buckets and market segments touched by updates since loading
+      (unchanged(); results.ResultStore only serves precomputed results of untouched listings)
+
+    upsert() appends or updates listings and only touches the index entries and cached
+    predictions of the affected rows. Row labels are never reused, so labels held by the
+    indexes stay valid. Writes are serialized with a lock.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.version = 0
+        self._lock = threading.RLock()
+        self._predictions = {}
+        self._derived = {}
+        self._touched = {"keys": set(), "comps": set(), "market": set()}
+        self._build_indexes()
+
+    def _build_indexes(self):
+        df = self.df
+        self._keys = pd.Series([listing_key(a, z) for a, z in zip(df["ADDRESS"], df["ZIP_CODE"])], index=df.index)
+        self._dup_counts = Counter(self._keys)
+        self._key_index = {k: list(df.index[pos]) for k, pos in self._keys.groupby(self._keys).indices.items()}
+        self._address_index = {a: list(df.index[pos]) for a, pos in df.groupby("ADDRESS").indices.items()}
+        self._comp_buckets = {k: set(df.index[pos]) for k, pos in df.groupby(COMP_KEY_COLUMNS).indices.items()}
+        self._market_groups = {k: set(df.index[pos]) for k, pos in df.groupby(MARKET_KEY_COLUMNS).indices.items()}
+        self.market = MarketStats(df)
+
+    # --- Lookups ---
+    def lookup(self, address: str) -> pd.DataFrame:
+        return self.df.loc[self._address_index.get(address, [])]
+
+    def comps_candidates(self, row) -> pd.DataFrame:
+        key = tuple(row[col] for col in COMP_KEY_COLUMNS)
+        return self.df.loc[sorted(self._comp_buckets.get(key, ()))]
+
+    def derived_index(self, name: str, build):
+        # build(df) once per dataset version; returns the index and the DataFrame it was built on
+        with self._lock:
+            version, index, df = self._derived.get(name, (None, None, None))
+            if version != self.version:
+                index, df = build(self.df), self.df
+                self._derived[name] = (self.version, index, df)
+            return index, df
+
+    def geo_comps(self, row, lat: float = None, lon: float = None, **params) -> pd.DataFrame:
+        geo, df = self.derived_index("geo", GeoCompsIndex)
+
+        lat = row.get("LATITUDE") if lat is None else lat
+        lon = row.get("LONGITUDE") if lon is None else lon
+        if lat is None or lon is None or pd.isna(lat) or pd.isna(lon):
+            return df.iloc[:0]
+        return geo.query(df, float(lat), float(lon), target_row=row, **params)
+
+    def unchanged(self, row) -> bool:
+        # True if no update since loading touched this listing, its comps bucket or its market segment
+        touched = self._touched
+        return (listing_key(row.get("ADDRESS", ""), row.get("ZIP_CODE", "")) not in touched["keys"]
+                and tuple(row.get(col) for col in COMP_KEY_COLUMNS) not in touched["comps"]
+                and tuple(row.get(col) for col in MARKET_KEY_COLUMNS) not in touched["market"])
+
+    def market_stats(self, row):
+        return self.market.lookup(row["ZIP_CODE"], row["PROP_TYPE"])
+
+    def is_duplicate(self, row) -> bool:
+        return self._dup_counts[listing_key(row.get("ADDRESS", ""), row.get("ZIP_CODE", ""))] > 1
+
+    def predict_rows(self, labels, model) -> np.ndarray:
+        # one CatBoost call for the rows without a cached prediction
+        labels = list(labels)
+        missing = [label for label in labels if label not in self._predictions]
+        if missing:
+            features, cat_cols = preprocess_for_model(self.df.loc[missing])
+            predictions = model.predict(Pool(features, cat_features=cat_cols))
+            self._predictions.update(zip(missing, map(float, predictions)))
+        return np.array([self._predictions[label] for label in labels], dtype=float)
+
+    # --- Incremental Updates ---
+    def _index_row(self, label, sign: int):
+        row = self.df.loc[label]
+        key = self._keys[label]
+        comp_key = tuple(row[col] for col in COMP_KEY_COLUMNS)
+        has_comp_key = not any(pd.isna(value) for value in comp_key)
+        market_key = tuple(row[col] for col in MARKET_KEY_COLUMNS)
+        has_market_key = not any(pd.isna(value) for value in market_key)
+        self._touched["keys"].add(key)
+        self._touched["comps"].add(comp_key)
+        self._touched["market"].add(market_key)
+
+        if sign > 0:
+            self._dup_counts[key] += 1
+            self._key_index.setdefault(key, []).append(label)
+            self._address_index.setdefault(row["ADDRESS"], []).append(label)
+            if has_comp_key:
+                self._comp_buckets.setdefault(comp_key, set()).add(label)
+            if has_market_key:
+                self._market_groups.setdefault(market_key, set()).add(label)
+        else:
+            self._dup_counts[key] -= 1
+            self._key_index[key].remove(label)
+            self._address_index[row["ADDRESS"]].remove(label)
+            if has_comp_key:
+                self._comp_buckets[comp_key].discard(label)
+            if has_market_key:
+                self._market_groups[market_key].discard(label)
+        self._predictions.pop(label, None)
+        return market_key if has_market_key else None
+
+    def _refresh_market(self, keys):
+        keys = {key for key in keys if key is not None}
+        labels = sorted(set().union(*(self._market_groups.get(key, set()) for key in keys)))
+        self.market.refresh(keys, self.df.loc[labels])
+
+    def _align(self, records) -> pd.DataFrame:
+        new = normalize_columns(pd.DataFrame(records if not isinstance(records, dict) else [records]))
+        for col in ("ADDRESS", "ZIP_CODE"):
+            if col not in new.columns:
+                raise ValueError(f"Listings must include {col}.")
+        new["ADDRESS"] = new["ADDRESS"].astype(str).str.strip()
+        # use the dataset's dtypes so keys and comps match (e.g. ZIP_CODE 2134 vs 2134.0); the whole batch
+        # is validated here, before upsert() touches any index, so an invalid value changes nothing
+        for col in new.columns.intersection(self.df.columns):
+            dtype = self.df[col].dtype
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+                values = pd.to_numeric(new[col], errors="coerce")
+                invalid = values.isna() & new[col].notna()
+                if pd.api.types.is_integer_dtype(dtype):
+                    invalid |= values.notna() & (values != values.round())
+                if invalid.any():
+                    raise ValueError(f"Invalid value {new[col][invalid].iloc[0]!r} for {col} ({dtype}).")
+                # missing values stay NaN (not written on update)
+                new[col] = values.astype(dtype) if values.notna().all() else values
+            else:
+                try:
+                    new[col] = new[col].astype(dtype)
+                except (ValueError, TypeError):
+                    raise ValueError(f"Invalid values for {col} ({dtype}).") from None
+        return new
+
+    def upsert(self, records, append_only: bool = False) -> dict:
+        """
+        Add listings (dict, list of dicts or DataFrame). A listing whose ADDRESS+ZIP_CODE already
+        exists updates that row, unless append_only is set (duplicates then raise the fraud flag).
+        Without append_only, a key repeated within the batch is applied once, with its last entry.
+        Returns the affected addresses and the new dataset version.
+        """
+        with self._lock:
+            new = self._align(records)
+            keys = [listing_key(a, z) for a, z in zip(new["ADDRESS"], new["ZIP_CODE"])]
+
+            # last entry per key (without append_only): repeated keys neither append twice nor update twice
+            last = {key: position for position, key in enumerate(keys)}
+
+            updates, appends = {}, []
+            market_keys = set()
+            for position, key in enumerate(keys):
+                if not append_only and last[key] != position:
+                    continue
+                labels = self._key_index.get(key)
+                if labels and not append_only:
+                    updates[labels[0]] = position
+                else:
+                    appends.append(position)
+
+            # updated rows: unindex, write the new values, reindex (also if the write fails)
+            for label, position in updates.items():
+                market_keys.add(self._index_row(label, -1))
+                try:
+                    values = new.iloc[position].dropna()
+                    for col in values.index.difference(self.df.columns):
+                        self.df[col] = pd.NA
+                    self.df.loc[label, values.index] = values.values
+                    self._keys[label] = keys[position]
+                finally:
+                    market_keys.add(self._index_row(label, +1))
+
+            # appended rows get fresh labels
+            if appends:
+                start = (self.df.index.max() + 1) if len(self.df) else 0
+                added = new.iloc[appends].set_axis(pd.RangeIndex(start, start + len(appends)))
+                self.df = pd.concat([self.df, added])
+                self._keys = pd.concat([self._keys, pd.Series([keys[p] for p in appends], index=added.index)])
+                for label in added.index:
+                    market_keys.add(self._index_row(label, +1))
+
+            self._refresh_market(market_keys)
+            self.version += 1
+            return {
+                "version": self.version,
+                "updated": [self.df.at[label, "ADDRESS"] for label in updates],
+                "added": list(new["ADDRESS"].iloc[appends]),
+            }
@@ -0,0 +1,80 @@
+import threading
+import numpy as np
+import pandas as pd
+from catboost import Pool
+
+from predict import preprocess_for_model
+
+# --- SHAP Explanations (CatBoost native ShapValues, no shap.TreeExplainer) ---
+class RentExplainer:
+    """
+    Per-feature SHAP contributions of the CatBoost rent model, computed with
+    model.get_feature_importance(type="ShapValues") on one batched Pool per request.
+    The baseline (expected prediction) only depends on the model and is cached.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.baseline = None
+
+    def explain(self, rows: pd.DataFrame, top_k: int = 5) -> list:
+        features, cat_cols = preprocess_for_model(rows)
+        pool = Pool(features, cat_features=cat_cols)
+
+        # (n_rows, n_pool_columns + 1), the last column is the expected value. The contributions are in
+        # the model's feature order (model.feature_names_), padded with zeros for pool columns the model does not use
+        shap_values = self.model.get_feature_importance(pool, type="ShapValues")
+        names = list(self.model.feature_names_ or features.columns)
+        contributions, expected = shap_values[:, :len(names)], shap_values[:, -1]
+        if self.baseline is None:
+            self.baseline = float(expected[0])
+
+        values = features.to_dict("records")
+        top = np.argsort(-np.abs(contributions), axis=1)[:, :top_k]
+
+        return [
+            {
+                "predicted_rent": round(float(expected[i] + contributions[i].sum()), 2),
+                "baseline": round(self.baseline, 2),
+                "contributions": [
+                    {
+                        "feature": names[j],
+                        "value": values[i][names[j]],
+                        "shap": round(float(contributions[i, j]), 2)
+                    }
+                    for j in top[i]
+                ]
+            }
+            for i in range(len(features))
+        ]
+
+
+# one explainer per loaded model (model version)
+_explainers = {}
+_lock = threading.Lock()
+
+
+def get_explainer(model) -> RentExplainer:
+    with _lock:
+        explainer = _explainers.get(id(model))
+        if explainer is None or explainer.model is not model:
+            explainer = _explainers[id(model)] = RentExplainer(model)
+        return explainer
+
+
+def explain_addresses(addresses, df_all: pd.DataFrame, model, top_k: int = 5, store=None) -> dict:
+    # batch: all found addresses are explained in one ShapValues call
+    found, labels, missing = [], [], []
+    for address in addresses:
+        rows = store.lookup(address) if store is not None else df_all[df_all["ADDRESS"] == address]
+        if rows.empty:
+            missing.append(address)
+        else:
+            found.append(address)
+            labels.append(rows.index[0])
+
+    explanations = get_explainer(model).explain(df_all.loc[labels], top_k) if labels else []
+    return {
+        "explanations": dict(zip(found, explanations)),
+        "not_found": missing
+    }
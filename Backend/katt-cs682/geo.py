@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+COORD_COLUMNS = ["LATITUDE", "LONGITUDE"]
+
+
+# --- Geospatial Comps (haversine BallTree over listing coordinates) ---
+class GeoCompsIndex:
+    """
+    Nearest listings by great-circle distance, for comps that do not stop at ZIP_CODE
+    boundaries. Built once over all listings with coordinates; a query is a radius search on the
+    tree followed by attribute checks on the listings inside the radius, nearest first.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        has_coords = all(col in df.columns for col in COORD_COLUMNS)
+        located = df[df[COORD_COLUMNS].notna().all(axis=1)] if has_coords else df.iloc[:0]
+
+        self.labels = located.index.to_numpy()
+        self.tree = BallTree(np.radians(located[COORD_COLUMNS].to_numpy(dtype=float)), metric="haversine") \
+            if len(located) else None
+
+    def query(self, df: pd.DataFrame, lat: float, lon: float, target_row=None, k: int = 20,
+              radius_km: float = 2.0, sqft_tolerance: float = 0.2, bed_tolerance: int = 0,
+              bath_tolerance: float = 0.5) -> pd.DataFrame:
+        """
+        Up to k listings within radius_km of (lat, lon), nearest first, with a DISTANCE_KM column.
+        With target_row, comps must also have the same PROP_TYPE, NO_BEDROOMS within bed_tolerance,
+        TOTAL_BATHS within bath_tolerance and SQUARE_FEET within sqft_tolerance (relative).
+        """
+        if self.tree is None:
+            return df.iloc[:0]
+
+        # candidates: every listing within radius_km (nearest first), so no matching comp inside the
+        # radius is missed however many closer listings fail the attribute checks
+        positions, distances = self.tree.query_radius(np.radians([[lat, lon]]), r=radius_km / EARTH_RADIUS_KM,
+                                                      return_distance=True, sort_results=True)
+        candidates = df.loc[self.labels[positions[0]]].copy()
+        candidates["DISTANCE_KM"] = distances[0] * EARTH_RADIUS_KM
+
+        if target_row is not None:
+            sqft = target_row["SQUARE_FEET"]
+            candidates = candidates[
+                (candidates["PROP_TYPE"] == target_row["PROP_TYPE"]) &
+                ((candidates["NO_BEDROOMS"] - target_row["NO_BEDROOMS"]).abs() <= bed_tolerance) &
+                ((candidates["TOTAL_BATHS"] - target_row["TOTAL_BATHS"]).abs() <= bath_tolerance) &
+                candidates["SQUARE_FEET"].between(sqft * (1 - sqft_tolerance), sqft * (1 + sqft_tolerance))
+            ]
+
+        return candidates.head(k)
@@ -0,0 +1,56 @@
+import pandas as pd
+
+# market segments: listings with the same ZIP_CODE and PROP_TYPE (see scoring.evaluation_insights)
+MARKET_KEY_COLUMNS = ["ZIP_CODE", "PROP_TYPE"]
+PRICE_COLUMN = "LIST_PRICE"
+
+
+# --- Aggregation (one groupby for all segments) ---
+def aggregate_market(df: pd.DataFrame) -> dict:
+    if df.empty:
+        return {}
+
+    groups = df.groupby(MARKET_KEY_COLUMNS)[PRICE_COLUMN]
+    table = groups.agg(["median", "mean", "std", "size"])
+    quantiles = groups.quantile([0.25, 0.75]).unstack()
+    table["q25"] = quantiles[0.25]
+    table["q75"] = quantiles[0.75]
+
+    return {
+        key: {
+            "median": row["median"],
+            "mean": row["mean"],
+            "std": row["std"],
+            # number of listings in the segment (including listings without a price)
+            "count": int(row["size"]),
+            "q25": row["q25"],
+            "q75": row["q75"],
+        }
+        for key, row in table.iterrows()
+    }
+
+
+# --- Materialized Market Statistics ---
+class MarketStats:
+    """
+    LIST_PRICE median/mean/std/count/quartiles per (ZIP_CODE, PROP_TYPE), computed once and
+    looked up in O(1). refresh() recomputes only the segments whose listings changed.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._stats = aggregate_market(df)
+
+    def lookup(self, zip_code, prop_type):
+        return self._stats.get((zip_code, prop_type))
+
+    def refresh(self, keys, df_segments: pd.DataFrame):
+        # df_segments: all current listings of the segments in keys
+        fresh = aggregate_market(df_segments)
+        for key in keys:
+            if key in fresh:
+                self._stats[key] = fresh[key]
+            else:
+                self._stats.pop(key, None)
+
+    def __len__(self):
+        return len(self._stats)
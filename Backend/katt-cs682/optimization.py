@@ -1,6 +1,124 @@
+from itertools import product
 from predict import *
+from geo import GeoCompsIndex
+
+# --- What-If Sweep Parameters ---
+# numerical parameters are swept as numbers, the others as categories (like preprocess_for_model)
+SWEEP_NUMERICAL = ["NO_BEDROOMS", "TOTAL_BATHS", "SQUARE_FEET"]
+SWEEP_CATEGORICAL = ["FURNISHED_RN", "PETS_ALLOWED_RN"]
+MAX_SWEEP_VARIANTS = 10000
+
+# --- Similarity Comps Parameters ---
+# weight of each feature in the squared distance; a categorical mismatch adds its full weight
+SIMILARITY_NUMERICAL = {"SQUARE_FEET": 2.0, "NO_BEDROOMS": 1.5, "TOTAL_BATHS": 1.0, "LOT_SIZE": 0.5, "YEAR_BUILT": 0.5}
+SIMILARITY_CATEGORICAL = {"PROP_TYPE": 2.0, "ZIP_CODE": 1.0}
+SIMILARITY_BLOCK_ROWS = 65536
+
+
+# --- Similarity Comps Index: top-k nearest listings by weighted, standardized features ---
+class CompsIndex:
+    """
+    Listings as rows of a standardized float32 matrix (numerical features z-scored, categoricals
+    one-hot), scaled by sqrt(weight) so the squared euclidean distance is the weighted distance.
+    A query scans the matrix in blocks of SIMILARITY_BLOCK_ROWS with one matrix product per block
+    and keeps the k best of each block (argpartition), so memory per query is bounded and latency
+    grows linearly with the number of listings (~0.1 s per million listings and 200 ZIP codes).
+    """
+
+    def __init__(self, df: pd.DataFrame, numerical: dict = SIMILARITY_NUMERICAL,
+                 categorical: dict = SIMILARITY_CATEGORICAL, block_rows: int = SIMILARITY_BLOCK_ROWS):
+        self.numerical = {col: w for col, w in numerical.items() if col in df.columns}
+        self.categorical = {col: w for col, w in categorical.items() if col in df.columns}
+        self.block_rows = block_rows
+        self.labels = df.index.to_numpy()
+
+        values = self._numeric(df)
+        self.mean = np.nanmean(values, axis=0) if len(df) else np.zeros(values.shape[1])
+        std = np.nanstd(values, axis=0) if len(df) else np.ones(values.shape[1])
+        self.std = np.where(std > 0, std, 1.0)
+        self.categories = {col: {value: i for i, value in enumerate(sorted(df[col].astype(str).unique()))}
+                           for col in self.categorical}
+
+        self.matrix = self.encode(df)
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+    def _numeric(self, df: pd.DataFrame) -> np.ndarray:
+        return np.column_stack([pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+                                for col in self.numerical]) if self.numerical else np.empty((len(df), 0))
+
+    def encode(self, df: pd.DataFrame) -> np.ndarray:
+        # missing numbers count as the mean; unseen categories match no listing
+        z = (self._numeric(df) - self.mean) / self.std
+        blocks = [np.nan_to_num(z) * np.sqrt(list(self.numerical.values()))]
+        for col, weight in self.categorical.items():
+            categories = self.categories[col]
+            one_hot = np.zeros((len(df), len(categories)))
+            positions = df[col].astype(str).map(categories)
+            known = positions.notna().to_numpy()
+            one_hot[np.flatnonzero(known), positions[known].astype(int)] = np.sqrt(weight / 2)
+            blocks.append(one_hot)
+        return np.ascontiguousarray(np.hstack(blocks), dtype=np.float32)
+
+    def query(self, rows: pd.DataFrame, k: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        # returns (labels, distances), each (len(rows), k'), nearest first, with k' = min(k, number of listings)
+        queries = self.encode(rows)
+        q_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+        k = min(k, len(self.labels))
+
+        best_d = np.empty((len(queries), 0), dtype=np.float32)
+        best_i = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(self.labels), self.block_rows):
+            block = self.matrix[start:start + self.block_rows]
+            d = self.sq_norms[start:start + len(block)] - 2 * queries @ block.T + q_norms
+            if len(block) > k:
+                top = np.argpartition(d, k - 1, axis=1)[:, :k]
+                d = np.take_along_axis(d, top, axis=1)
+            else:
+                top = np.broadcast_to(np.arange(len(block)), d.shape)
+            best_d = np.hstack([best_d, d])
+            best_i = np.hstack([best_i, top + start])
+            if best_d.shape[1] > k:
+                keep = np.argpartition(best_d, k - 1, axis=1)[:, :k]
+                best_d = np.take_along_axis(best_d, keep, axis=1)
+                best_i = np.take_along_axis(best_i, keep, axis=1)
+
+        order = np.argsort(best_d, axis=1, kind="stable")
+        distances = np.sqrt(np.maximum(np.take_along_axis(best_d, order, axis=1), 0))
+        return self.labels[np.take_along_axis(best_i, order, axis=1)], distances
+
+    def similar(self, df: pd.DataFrame, row: pd.DataFrame, k: int = 10) -> pd.DataFrame:
+        labels, distances = self.query(row.iloc[:1], k)
+        comps = df.loc[labels[0]].copy()
+        comps["SIMILARITY_DISTANCE"] = distances[0]
+        return comps
+
+
+def get_similar_properties(target_row, df_all, sqft_tolerance=0.2, store=None, geo=None, similar=None):
+    # similar: {"k"} -> the k most similar listings by weighted feature distance (CompsIndex), no hard filters
+    if similar is not None:
+        index, df_index = store.derived_index("similarity", CompsIndex) if store is not None \
+            else (CompsIndex(df_all), df_all)
+        return index.similar(df_index, target_row, **similar)
+
+    # geo: {"lat", "lon", "k", "radius_km"} (all optional) -> k nearest comps within the radius,
+    # across ZIP_CODE boundaries (geo.GeoCompsIndex); lat/lon default to the listing's coordinates
+    if geo is not None:
+        row = target_row.iloc[0]
+        if store is not None:
+            return store.geo_comps(row, sqft_tolerance=sqft_tolerance, **geo)
+        geo = dict(geo)
+        lat, lon = geo.pop("lat", None), geo.pop("lon", None)
+        lat = row.get("LATITUDE") if lat is None else lat
+        lon = row.get("LONGITUDE") if lon is None else lon
+        if lat is None or lon is None or pd.isna(lat) or pd.isna(lon):
+            return df_all.iloc[:0]
+        return GeoCompsIndex(df_all).query(df_all, float(lat), float(lon), target_row=row,
+                                           sqft_tolerance=sqft_tolerance, **geo)
+
+    # with a dataset.ListingStore, only scan the listing's comps bucket
+    if store is not None:
+        df_all = store.comps_candidates(target_row.iloc[0])
 
-def get_similar_properties(target_row, df_all, sqft_tolerance=0.2):
     conditions = (
         (df_all["ZIP_CODE"] == target_row["ZIP_CODE"].values[0]) &
         (df_all["NO_BEDROOMS"] == target_row["NO_BEDROOMS"].values[0]) &
@@ -17,25 +135,8 @@ def get_similar_properties(target_row, df_all, sqft_tolerance=0.2):
     return df_all[conditions]
 
 
-def rental_optimization_insight(address: str, df_all: pd.DataFrame, model) -> str:
-    target = df_all[df_all["ADDRESS"] == address]
-    if target.empty:
-        return f"❌ ADDRESS {address} not found."
-
-    target_features, cat_cols = preprocess_for_model(target)
-    pool = Pool(target_features, cat_features=cat_cols)
-    predicted_rent = model.predict(pool)[0]
-
-    comps = get_similar_properties(target, df_all).copy()
-    if comps.empty:
-        return "⚠️ No similar properties found for comparison."
-
-    comps_features, _ = preprocess_for_model(comps)
-    comps_pool = Pool(comps_features, cat_features=cat_cols)
-    comps["PREDICTED_RENT"] = model.predict(comps_pool)
-
-    median_rent = comps["PREDICTED_RENT"].median()
-    std_rent = comps["PREDICTED_RENT"].std()
+# --- Pricing Rule: predicted rent vs. the comps (also used by bulk_score.py) ---
+def price_position(predicted_rent, median_rent, std_rent):
     price_gap = predicted_rent - median_rent
     optimal_rent =  predicted_rent
 
@@ -51,16 +152,102 @@ def rental_optimization_insight(address: str, df_all: pd.DataFrame, model) -> st
         suggestion = f"You could raise rent by ${abs(price_gap):.0f}, but ensure demand still exists."
         optimal_rent = optimal_rent + abs(price_gap)
 
+    return likelihood, suggestion, optimal_rent
+
+
+def rental_optimization_insight(address: str, df_all: pd.DataFrame, model, store=None, intervals=None, geo=None,
+                                similar=None) -> str:
+    target = store.lookup(address) if store is not None else df_all[df_all["ADDRESS"] == address]
+    if target.empty:
+        return f"❌ ADDRESS {address} not found."
+
+    # with predict.PredictionIntervals, the point estimate and its interval come from the same call
+    interval = None
+    if intervals is not None:
+        interval = intervals.interval_for(target.iloc[:1])
+        predicted_rent = interval["predicted_rent"]
+    elif store is not None:
+        predicted_rent = store.predict_rows(target.index[:1], model)[0]
+    else:
+        target_features, cat_cols = preprocess_for_model(target)
+        pool = Pool(target_features, cat_features=cat_cols)
+        predicted_rent = model.predict(pool)[0]
+
+    comps = get_similar_properties(target, df_all, store=store, geo=geo, similar=similar).copy()
+    if comps.empty:
+        return "⚠️ No similar properties found for comparison."
+
+    if store is not None:
+        comps["PREDICTED_RENT"] = store.predict_rows(comps.index, model)
+    else:
+        comps_features, cat_cols = preprocess_for_model(comps)
+        comps_pool = Pool(comps_features, cat_features=cat_cols)
+        comps["PREDICTED_RENT"] = model.predict(comps_pool)
+
+    median_rent = comps["PREDICTED_RENT"].median()
+    # uncertainty band: half-width of the prediction interval when it is calibrated, otherwise the comps' spread
+    # (an uncalibrated virtual-ensemble interval is far too narrow to judge the market alignment)
+    if interval is not None and interval["calibrated"]:
+        std_rent = (interval["upper"] - interval["lower"]) / 2
+    else:
+        std_rent = comps["PREDICTED_RENT"].std()
+    price_gap = predicted_rent - median_rent
+    likelihood, suggestion, optimal_rent = price_position(predicted_rent, median_rent, std_rent)
+
     return (
         # f"\n📍 RENTAL INCOME INSIGHT\n"
         # f"----------------------------\n"
         {
-            "predicted_rent": round(predicted_rent, 2),
-            "median_rent": median_rent,
-            "difference": round(price_gap, 2),
+            "predicted_rent": round(float(predicted_rent), 2),
+            "median_rent": float(median_rent),
+            "difference": round(float(price_gap), 2),
             "likelihood": likelihood,
             "num_comps": len(comps),
+            "comps_mode": "geo" if geo is not None else "similar" if similar is not None else "zip",
             "suggestion": suggestion,
-            "optimal_rent": round(optimal_rent, 2)
+            "optimal_rent": round(float(optimal_rent), 2),
+            "prediction_interval": interval
         }
     )
+
+
+# --- What-If Sweep: predicted rent over a grid of listing changes ---
+def rent_sweep(address: str, df_all: pd.DataFrame, model, grid: dict, store=None) -> dict:
+    unknown = set(grid) - set(SWEEP_NUMERICAL + SWEEP_CATEGORICAL)
+    if unknown:
+        raise ValueError(f"Cannot sweep {sorted(unknown)}; allowed: {SWEEP_NUMERICAL + SWEEP_CATEGORICAL}")
+    if not grid or any(not values for values in grid.values()):
+        raise ValueError("Each swept parameter needs at least one value.")
+
+    target = store.lookup(address) if store is not None else df_all[df_all["ADDRESS"] == address]
+    if target.empty:
+        raise KeyError(f"ADDRESS {address} not found.")
+
+    parameters = list(grid)
+    variants = list(product(*(grid[p] for p in parameters)))
+    if len(variants) > MAX_SWEEP_VARIANTS:
+        raise ValueError(f"Sweep has {len(variants)} variants; the maximum is {MAX_SWEEP_VARIANTS}.")
+
+    # preprocess the subject row once, then repeat it: row 0 is the unchanged listing, rows 1.. the variants
+    base_features, cat_cols = preprocess_for_model(target.iloc[:1])
+    features = base_features.loc[base_features.index.repeat(len(variants) + 1)].reset_index(drop=True)
+    for i, parameter in enumerate(parameters):
+        values = [variant[i] for variant in variants]
+        if parameter in SWEEP_NUMERICAL:
+            features.loc[1:, parameter] = pd.to_numeric(pd.Series(values), errors="raise").astype(float).values
+        else:
+            features.loc[1:, parameter] = [str(value) for value in values]
+
+    # one CatBoost call for the whole response surface
+    predictions = model.predict(Pool(features, cat_features=cat_cols))
+
+    return {
+        "address": address,
+        "base": base_features[parameters].to_dict("records")[0],
+        "base_predicted_rent": round(float(predictions[0]), 2),
+        "parameters": parameters,
+        "variants": [
+            {**dict(zip(parameters, variant)), "predicted_rent": round(float(rent), 2)}
+            for variant, rent in zip(variants, predictions[1:])
+        ]
+    }
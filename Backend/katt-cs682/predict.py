@@ -1,3 +1,5 @@
+import os
+import numpy as np
 import pandas as pd
 from catboost import Pool
 
@@ -39,13 +41,110 @@ def preprocess_for_model(df_row: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]
     return features, categorical_cols
 
 
-def predict_rent_for_address(address: str, df_all: pd.DataFrame, model) -> str:
-    row = df_all[df_all["ADDRESS"] == address]
+def predict_rent_for_address(address: str, df_all: pd.DataFrame, model, store=None) -> str:
+    # with a dataset.ListingStore, use its address index and cached predictions
+    row = store.lookup(address) if store is not None else df_all[df_all["ADDRESS"] == address]
     if row.empty:
         return f"❌ ADDRESS {address} not found."
 
-    features, cat_cols = preprocess_for_model(row)
-    pool = Pool(features, cat_features=cat_cols)
-    predicted_rent = model.predict(pool)[0]
+    if store is not None:
+        predicted_rent = store.predict_rows(row.index[:1], model)[0]
+    else:
+        features, cat_cols = preprocess_for_model(row)
+        pool = Pool(features, cat_features=cat_cols)
+        predicted_rent = model.predict(pool)[0]
 
     return f"{predicted_rent:.2f}"
+
+
+# --- Prediction Intervals ---
+class PredictionIntervals:
+    """
+    Point prediction and prediction interval in a single CatBoost call.
+
+    - MultiQuantile models: the interval comes from the predicted quantiles.
+    - Other models: virtual ensembles (model.virtual_ensembles_predict), the interval is
+      point +/- scale * spread of the ensembles. calibrate() sets scale on listings with a
+      known rent that the model was not trained on (split-conformal), so the interval reaches
+      the requested coverage; until then a normal quantile is used and the interval is not
+      calibrated. Calibrating on training listings gives a scale that is too small.
+    """
+
+    def __init__(self, model, coverage: float = 0.8, n_ensembles: int = 10):
+        self.model = model
+        self.coverage = coverage
+        self.n_ensembles = n_ensembles
+        self.scale = 1.2816  # normal quantile for 80% coverage, replaced by calibrate()
+        self.calibrated = False
+
+        # "MultiQuantile:alpha=0.1,0.5,0.9"
+        loss = str(model.get_params().get("loss_function", ""))
+        self.alphas = None
+        if loss.startswith("MultiQuantile") and "alpha=" in loss:
+            self.alphas = [float(a) for a in loss.split("alpha=")[1].split(";")[0].split(",")]
+
+    def _predict(self, pool, thread_count: int = -1):
+        if self.alphas is not None:
+            quantiles = self.model.predict(pool, thread_count=thread_count)
+            alphas = np.array(self.alphas)
+            point = quantiles[:, np.argmin(np.abs(alphas - 0.5))]
+            lower = quantiles[:, np.argmin(np.abs(alphas - (1 - self.coverage) / 2))]
+            upper = quantiles[:, np.argmin(np.abs(alphas - (1 + self.coverage) / 2))]
+            return point, lower, upper, None
+
+        # (n_rows, n_ensembles, 1); the last virtual ensemble uses all trees, i.e. it equals model.predict()
+        ensembles = self.model.virtual_ensembles_predict(pool, prediction_type="VirtEnsembles",
+                                                         virtual_ensembles_count=self.n_ensembles,
+                                                         thread_count=thread_count)[:, :, 0]
+        point = ensembles[:, -1]
+        spread = ensembles.std(axis=1) + 1e-6
+        return point, point - self.scale * spread, point + self.scale * spread, spread
+
+    def predict(self, pool, thread_count: int = -1) -> tuple:
+        point, lower, upper, _ = self._predict(pool, thread_count)
+        return point, lower, upper
+
+    def calibrate(self, df: pd.DataFrame, max_rows: int = 2000, seed: int = 42):
+        # held-out listings with a known rent (LIST_PRICE) as the calibration set
+        known = df[pd.to_numeric(df.get("LIST_PRICE"), errors="coerce").notna()]
+        if self.alphas is not None or len(known) < 20:
+            return self
+        known = known.sample(n=min(max_rows, len(known)), random_state=seed)
+
+        features, cat_cols = preprocess_for_model(known)
+        point, _, _, spread = self._predict(Pool(features, cat_features=cat_cols))
+        scores = np.abs(pd.to_numeric(known["LIST_PRICE"]).to_numpy() - point) / spread
+
+        n = len(scores)
+        level = min(np.ceil((n + 1) * self.coverage) / n, 1.0)
+        self.scale = float(np.quantile(scores, level))
+        self.calibrated = True
+        return self
+
+    def interval_for(self, rows: pd.DataFrame) -> dict:
+        features, cat_cols = preprocess_for_model(rows)
+        point, lower, upper = self.predict(Pool(features, cat_features=cat_cols))
+        return {
+            "predicted_rent": round(float(point[0]), 2),
+            "lower": round(float(lower[0]), 2),
+            "upper": round(float(upper[0]), 2),
+            "coverage": self.coverage,
+            "calibrated": self.calibrated or self.alphas is not None
+        }
+
+
+def holdout_path(model_path: str) -> str:
+    # listings held out of training by train.py, saved next to the model
+    return os.path.splitext(model_path)[0] + ".holdout.csv"
+
+
+def calibrated_intervals(model, model_path: str) -> PredictionIntervals:
+    """
+    Prediction intervals of a model, calibrated on its held-out listings (holdout_path). A model
+    without them (e.g. trained elsewhere) keeps the uncalibrated normal-quantile interval.
+    """
+    intervals = PredictionIntervals(model)
+    path = holdout_path(model_path)
+    if os.path.exists(path):
+        intervals.calibrate(pd.read_csv(path, low_memory=False))
+    return intervals
@@ -0,0 +1,183 @@
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+import orjson
+from catboost import CatBoostRegressor
+
+from predict import predict_rent_for_address, calibrated_intervals
+from optimization import rental_optimization_insight
+from scoring import evaluation_insights, evaluation
+from dataset import load_listings, ListingStore, DATA_PATH
+
+# shared response encoding (Backend/web), so stored payloads are encoded like the live responses
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from web.responses import file_version, _default
+
+MODEL_PATH = "rent_predictor_model.cbm"
+RESULTS_PATH = os.environ.get("RESULTS_DB", "results.sqlite")
+
+# --- Precomputed Rent Insights ---
+# python results.py --data cleaned_data.csv --output results.sqlite   (nightly)
+#
+# Most /api/rent-insights requests are for addresses already in the dataset. The nightly job computes
+# the full response of every listing (same code as the live route, default ZIP_CODE comps) into a SQLite
+# table keyed on ADDRESS, stored as ready-to-send JSON. The API answers from it with one primary-key
+# lookup and computes live when the address is unknown, the file was built for another model or data
+# file, or a live update (POST /api/listings) touched the listing, its comps bucket or its market segment.
+
+
+# --- Response (shared by the live route and the nightly job) ---
+def parse_evaluation_string(evaluation_string):
+    result = {}
+    for line in evaluation_string.split('\n'):
+        if "Risk Score:" in line:
+            result["risk_score"] = float(re.findall(r"\d+\.\d+|\d+", line)[0])
+        elif "Disclosure Risk:" in line:
+            result["disclosure_risk"] = float(re.findall(r"\d+\.\d+|\d+", line)[0])
+        elif "Renovation Candidate:" in line:
+            result["renovation_candidate"] = "Yes" in line
+        elif "Fraud Flag:" in line:
+            result["fraud_flag"] = "Yes" in line
+        elif "Total Risk Score:" in line:
+            result["total_risk_score"] = float(re.findall(r"\d+\.\d+|\d+", line)[0])
+    return result
+
+
+def rent_insights(address, store, model, intervals=None, comps=None) -> dict:
+    df_all = store.df
+    predicted_rent = predict_rent_for_address(address, df_all, model, store=store)
+    optimal_rent = rental_optimization_insight(address, df_all, model, store=store, intervals=intervals,
+                                               **(comps or {}))
+    insights = evaluation_insights(address, store=store)
+    raw_eval = evaluation(DATA_PATH, address, store=store)
+    parsed_eval = parse_evaluation_string(raw_eval)
+    return {
+        "predicted_rent": predicted_rent,
+        "optimal_rent": optimal_rent,
+        "prediction_interval": optimal_rent.get("prediction_interval") if isinstance(optimal_rent, dict) else None,
+        "median_rent": insights.get("median_rent"),
+        "diff_from_median": insights.get("difference_from_median"),
+        "likelihood": insights.get("likelihood"),
+        "num_comps": insights.get("num_comps"),
+        "risk_score": parsed_eval.get("risk_score"),
+        "disclosure_risk": parsed_eval.get("disclosure_risk"),
+        "renovation_candidate": parsed_eval.get("renovation_candidate"),
+        "fraud_flag": parsed_eval.get("fraud_flag"),
+        "total_risk_score": parsed_eval.get("total_risk_score")
+    }
+
+
+def results_version(model_path=MODEL_PATH, data_path=DATA_PATH) -> str:
+    # precomputed results are only valid for the model and data file they were computed with
+    return f"{file_version(model_path)}:{file_version(data_path)}"
+
+
+# --- Result Store (read side, used by app.py) ---
+class ResultStore:
+    """
+    Read-only view of a results file built by build_results(). get() returns the stored JSON bytes
+    of an address, or None when the live result must be computed. The file is reopened when the
+    nightly job replaces it; each thread uses its own SQLite connection.
+    """
+
+    def __init__(self, path: str, version: str):
+        self.path = path
+        self.version = version
+        self.stats = {"hits": 0, "misses": 0}
+        self._local = threading.local()
+
+    def _connection(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+        local = self._local
+        if getattr(local, "file_id", None) != file_id:
+            if getattr(local, "conn", None) is not None:
+                local.conn.close()
+            local.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            meta = dict(local.conn.execute("SELECT name, value FROM meta"))
+            local.valid = meta.get("version") == self.version
+            local.file_id = file_id
+        return local.conn if local.valid else None
+
+    def get(self, address: str, store: ListingStore = None):
+        conn = self._connection()
+        found = conn.execute("SELECT payload FROM results WHERE address = ?", (address,)).fetchone() \
+            if conn is not None else None
+        if found is not None and store is not None:
+            target = store.lookup(address)
+            if target.empty or not store.unchanged(target.iloc[0]):
+                found = None
+        self.stats["hits" if found is not None else "misses"] += 1
+        return found[0] if found is not None else None
+
+
+# --- Nightly Job (write side) ---
+def build_results(data_path=DATA_PATH, model_path=MODEL_PATH, output_path=RESULTS_PATH) -> dict:
+    start = time.perf_counter()
+    store = ListingStore(load_listings(data_path))
+    model = CatBoostRegressor()
+    model.load_model(model_path)
+    # same calibration as app.py, so stored and live prediction intervals agree
+    intervals = calibrated_intervals(model, model_path)
+    # every comps lookup reuses these cached predictions (one CatBoost call)
+    store.predict_rows(store.df.index, model)
+
+    # written to a temporary file and swapped in, so the API keeps reading the previous results meanwhile
+    tmp_path = output_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("CREATE TABLE results (address TEXT PRIMARY KEY, payload BLOB) WITHOUT ROWID")
+
+    rows, errors = 0, 0
+    batch = []
+    for address in store.df["ADDRESS"].drop_duplicates():
+        try:
+            payload = rent_insights(address, store, model, intervals)
+        except Exception as e:
+            errors += 1
+            print(f"Skipping {address}: {str(e)}")
+            continue
+        batch.append((address, orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)))
+        if len(batch) >= 1000:
+            conn.executemany("INSERT INTO results VALUES (?, ?)", batch)
+            rows += len(batch)
+            batch = []
+    conn.executemany("INSERT INTO results VALUES (?, ?)", batch)
+    rows += len(batch)
+
+    conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+        ("version", results_version(model_path, data_path)),
+        ("built_at", time.strftime("%Y-%m-%dT%H:%M:%S")),
+    ])
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, output_path)
+
+    seconds = time.perf_counter() - start
+    return {"rows": rows, "errors": errors, "seconds": round(seconds, 2),
+            "rows_per_second": round(rows / seconds, 1) if seconds else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the rent insights of every listing into SQLite.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    summary = build_results(args.data, args.model, args.output)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
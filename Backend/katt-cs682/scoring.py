@@ -3,6 +3,7 @@ import re
 from fruad import *
 from disclosure import *
 from renovation import *
+from dataset import normalize_columns
 
 # --- Utility Functions ---
 def clean_text(text: str) -> str:
@@ -57,12 +58,15 @@ def run_risk_pipeline(df: pd.DataFrame) -> pd.DataFrame:
     df['total_risk_score'] = df['risk_score'] + df['disclosure_risk'] + df['fraud_flag'].astype(float)
     return df
 
-def evaluation(filepath: str, target_address: str) -> str:
-    df = pd.read_csv(filepath)
-    df.columns = df.columns.str.strip().str.upper().str.replace(" ", "_")
-    df['ADDRESS'] = df['ADDRESS'].astype(str)
+def evaluation(filepath: str, target_address: str, store=None) -> str:
+    # with a dataset.ListingStore, use the live dataset and its duplicate counts instead of re-reading filepath
+    if store is not None:
+        match = store.lookup(str(target_address))
+    else:
+        df = normalize_columns(pd.read_csv(filepath))
+        df['ADDRESS'] = df['ADDRESS'].astype(str)
+        match = df[df['ADDRESS'] == str(target_address)]
 
-    match = df[df['ADDRESS'] == str(target_address)]
     if match.empty:
         return f"[ERROR] ADDRESS {target_address} not found in dataset."
 
@@ -71,7 +75,7 @@ def evaluation(filepath: str, target_address: str) -> str:
     risk_score = assess_risk(row)
     disclosure_risk = calculate_disclosure_risk(row.get('DISCLOSURES', ''), row)
     renovation_candidate = is_renovation_candidate(str(row.get('DISCLOSURES', '')))
-    fraud_flag = detect_fraud_single(row, df)
+    fraud_flag = store.is_duplicate(row) if store is not None else detect_fraud_single(row, df)
     total_risk_score = round(risk_score + disclosure_risk + float(fraud_flag), 2)
 
     return (
@@ -84,37 +88,48 @@ def evaluation(filepath: str, target_address: str) -> str:
     )
 
 # --- ✅ New: Rent Insights Function ---
-def evaluation_insights(list_no: str) -> dict:
+def evaluation_insights(list_no: str, df: pd.DataFrame = None, market=None, store=None) -> dict:
+    empty = {
+        "median_rent": None,
+        "difference_from_median": None,
+        "likelihood": None,
+        "num_comps": 0
+    }
     try:
-        df = pd.read_csv("cleaned_data.csv")
-        # df.columns = df.columns.str.strip().str.upper().str.replace(" ", "_")
-        # df['LIST_NO'] = df['LIST_NO'].astype(str)
-        df["ADDRESS"] = df["ADDRESS"].astype(str).str.strip()
-        match = df[df["ADDRESS"].str.contains(list_no, case=False, na=False)]
+        # with a dataset.ListingStore, use its address index (exact ADDRESS, includes upserted listings)
+        # and its market statistics instead of scanning every address
+        if store is not None:
+            match = store.lookup(list_no)
+            market = store.market if market is None else market
+        else:
+            # pass the live dataset (addresses already stripped) to avoid re-reading the CSV
+            if df is None:
+                df = pd.read_csv("cleaned_data.csv")
+                # df.columns = df.columns.str.strip().str.upper().str.replace(" ", "_")
+                # df['LIST_NO'] = df['LIST_NO'].astype(str)
+                df["ADDRESS"] = df["ADDRESS"].astype(str).str.strip()
+            match = df[df["ADDRESS"].str.contains(list_no, case=False, na=False)]
         if match.empty:
-            return {
-                "median_rent": None,
-                "difference_from_median": None,
-                "likelihood": None,
-                "num_comps": 0
-            }
+            return empty
 
         row = match.iloc[0]
         zip_code = row['ZIP_CODE']
         prop_type = row['PROP_TYPE']
         subject_rent = row['LIST_PRICE']
 
-        comps = df[(df['ZIP_CODE'] == zip_code) & (df['PROP_TYPE'] == prop_type)]
-        num_comps = len(comps)
+        # market.MarketStats: precomputed per (ZIP_CODE, PROP_TYPE), O(1) lookup
+        if market is not None:
+            stats = market.lookup(zip_code, prop_type)
+            num_comps = stats["count"] if stats else 0
+            median_rent = stats["median"] if stats else None
+        else:
+            comps = df[(df['ZIP_CODE'] == zip_code) & (df['PROP_TYPE'] == prop_type)]
+            num_comps = len(comps)
+            median_rent = comps['LIST_PRICE'].median() if num_comps else None
+
         if num_comps == 0:
-            return {
-                "median_rent": None,
-                "difference_from_median": None,
-                "likelihood": None,
-                "num_comps": 0
-            }
-
-        median_rent = comps['LIST_PRICE'].median()
+            return empty
+
         diff = round(subject_rent - median_rent, 2)
         likelihood = round(1 - abs(diff) / median_rent, 2)
 
@@ -126,10 +141,4 @@ def evaluation_insights(list_no: str) -> dict:
         }
 
     except Exception as e:
-        return {
-            "median_rent": None,
-            "difference_from_median": None,
-            "likelihood": None,
-            "num_comps": 0,
-            "error": str(e)
-        }
\ No newline at end of file
+        return {**empty, "error": str(e)}
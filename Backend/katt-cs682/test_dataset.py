@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from dataset import ListingStore
+
+
+def make_store():
+    return ListingStore(pd.DataFrame({
+        "ADDRESS": ["10 Main St", "12 Main St", "14 Main St"],
+        "ZIP_CODE": [2134, 2134, 2135],
+        "PROP_TYPE": ["RN", "RN", "RN"],
+        "NO_BEDROOMS": [2, 2, 3],
+        "TOTAL_BATHS": [1.0, 1.0, 2.0],
+        "SQUARE_FEET": [900.0, 950.0, 1200.0],
+        "YEAR_BUILT": [1990, 2001, 1985],
+        "LIST_PRICE": [2500.0, 2600.0, 3100.0],
+    }))
+
+
+@pytest.mark.parametrize("change", [{"YEAR_BUILT": "unknown"}, {"NO_BEDROOMS": 2.5}, {"SQUARE_FEET": "big"}])
+def test_failed_update_leaves_store_unchanged(change):
+    store = make_store()
+    before = store.df.copy()
+    with pytest.raises(ValueError):
+        store.upsert({"ADDRESS": "10 Main St", "ZIP_CODE": 2134, "LIST_PRICE": 2700.0, **change})
+
+    pd.testing.assert_frame_equal(store.df, before)
+    assert store.version == 0
+    assert list(store.lookup("10 Main St").index) == [0]
+    assert not store.is_duplicate(store.df.loc[0])
+    assert 0 in set(store.comps_candidates(store.df.loc[0]).index)
+
+    # the next valid update of the same listing still updates it in place
+    result = store.upsert({"ADDRESS": "10 Main St", "ZIP_CODE": "2134", "NO_BEDROOMS": "3", "LIST_PRICE": 2700})
+    assert result["updated"] == ["10 Main St"] and result["added"] == []
+    assert len(store.df) == 3
+    assert store.df.at[0, "NO_BEDROOMS"] == 3 and store.df.at[0, "LIST_PRICE"] == 2700.0
+    assert 0 in set(store.comps_candidates(store.df.loc[0]).index)
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import shutil
+import time
+import hashlib
+import inspect
+import argparse
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor, Pool
+
+from predict import preprocess_for_model, holdout_path
+from dataset import load_listings, DATA_PATH
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from web import file_version
+
+MODEL_PATH = "rent_predictor_model.cbm"  # the production model (served by app.py)
+MODELS_DIR = "models"
+CACHE_DIR = "pool_cache"
+TARGET_COLUMN = "LIST_PRICE"
+
+# same settings as the shipped rent_predictor_model.cbm
+DEFAULT_PARAMS = {"loss_function": "MAE", "iterations": 1000, "depth": 6, "learning_rate": 0.05}
+
+# --- Retraining Pipeline ---
+# python train.py --data cleaned_data.csv                        -> models/rent_predictor_<timestamp>.cbm
+# python train.py --data cleaned_data.csv --replace-production   -> rent_predictor_model.cbm
+#
+# A new model is written under models/ unless --replace-production is given, so a plain run never
+# overwrites the model the API serves.
+#
+# Features come from predict.preprocess_for_model, so the trained model sees exactly what the API
+# sends it. The processed training/validation pools are quantized once and saved in CatBoost's
+# binary format under pool_cache/<key>/; key = data file(s) + preprocess_for_model source + split and
+# quantization settings. Later runs with other training parameters (depth, learning rate, ...) load
+# the cached pools directly, without parsing the CSV or building features.
+#
+# The validation listings (only used for early stopping, never fitted) are saved next to the model as
+# <model>.holdout.csv; the API calibrates the model's prediction intervals on them.
+
+
+# --- Cache Key ---
+def cache_key(paths, border_count: int, valid_fraction: float, seed: int) -> str:
+    parts = [file_version(path) for path in paths]
+    parts += [inspect.getsource(preprocess_for_model), str(border_count), str(valid_fraction), str(seed)]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+# --- Features + Quantized Pools ---
+def build_pools(paths, cache_dir: str, border_count: int, valid_fraction: float, seed: int):
+    df = load_listings(paths)
+    target = pd.to_numeric(df[TARGET_COLUMN], errors="coerce")
+    df = df[target.notna() & (target > 0)]
+
+    features, cat_cols = preprocess_for_model(df)
+    label = pd.to_numeric(df[TARGET_COLUMN]).to_numpy(dtype=float)
+
+    # random train/validation split (validation drives early stopping)
+    order = np.random.default_rng(seed).permutation(len(df))
+    n_valid = max(1, int(len(df) * valid_fraction))
+    valid_pos, train_pos = order[:n_valid], order[n_valid:]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    borders_path = os.path.join(cache_dir, "borders.tsv")
+
+    train = Pool(features.iloc[train_pos], label[train_pos], cat_features=cat_cols)
+    train.quantize(border_count=border_count)
+    train.save_quantization_borders(borders_path)
+    # the validation pool uses the training borders, so both pools bin features the same way
+    valid = Pool(features.iloc[valid_pos], label[valid_pos], cat_features=cat_cols)
+    valid.quantize(input_borders=borders_path)
+
+    train.save(os.path.join(cache_dir, "train.bin"))
+    valid.save(os.path.join(cache_dir, "valid.bin"))
+    df.iloc[valid_pos].to_csv(os.path.join(cache_dir, "valid.csv"), index=False)
+    with open(os.path.join(cache_dir, "info.json"), "w") as f:
+        json.dump({"paths": list(paths), "rows": len(df), "train_rows": len(train_pos), "valid_rows": len(valid_pos),
+                   "features": list(features.columns), "cat_features": cat_cols, "border_count": border_count}, f, indent=2)
+
+
+def load_pools(paths, cache_dir: str = CACHE_DIR, border_count: int = 254, valid_fraction: float = 0.2,
+               seed: int = 42, rebuild: bool = False):
+    """
+    Returns (train_pool, valid_pool, from_cache, key_dir): quantized pools loaded from the cache, built
+    first if the data, the feature logic or the settings changed (or rebuild is set). key_dir also holds
+    the raw validation listings (valid.csv).
+    """
+    key_dir = os.path.join(cache_dir, cache_key(paths, border_count, valid_fraction, seed))
+    from_cache = all(os.path.exists(os.path.join(key_dir, name)) for name in ("info.json", "valid.csv")) \
+        and not rebuild
+    if not from_cache:
+        build_pools(paths, key_dir, border_count, valid_fraction, seed)
+    train = Pool("quantized://" + os.path.join(key_dir, "train.bin"))
+    valid = Pool("quantized://" + os.path.join(key_dir, "valid.bin"))
+    return train, valid, from_cache, key_dir
+
+
+# --- Training ---
+def train_model(train: Pool, valid: Pool, params: dict = None, threads: int = -1, early_stopping_rounds: int = 50,
+                seed: int = 42) -> CatBoostRegressor:
+    # all cores (thread_count=-1); stops when the validation MAE has not improved for early_stopping_rounds
+    model = CatBoostRegressor(**{**DEFAULT_PARAMS, **(params or {})}, thread_count=threads, random_seed=seed,
+                              verbose=100)
+    model.fit(train, eval_set=valid, early_stopping_rounds=early_stopping_rounds, use_best_model=True)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the CatBoost rent model on cached, quantized pools.")
+    parser.add_argument("--data", nargs="+", default=[DATA_PATH], help="Listing CSV file(s)")
+    parser.add_argument("--output", default=None,
+                        help=f"Model file (default: {MODELS_DIR}/rent_predictor_<timestamp>.cbm)")
+    parser.add_argument("--replace-production", action="store_true",
+                        help=f"Write the production model ({MODEL_PATH})")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the cached pools")
+    parser.add_argument("--border-count", type=int, default=254)
+    parser.add_argument("--valid-fraction", type=float, default=0.2)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_PARAMS["iterations"])
+    parser.add_argument("--depth", type=int, default=DEFAULT_PARAMS["depth"])
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_PARAMS["learning_rate"])
+    parser.add_argument("--early-stopping", type=int, default=50, help="Rounds without improvement before stopping")
+    parser.add_argument("--threads", type=int, default=-1, help="Training threads (default: all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.replace_production:
+        if args.output is not None and os.path.abspath(args.output) != os.path.abspath(MODEL_PATH):
+            parser.error(f"--replace-production writes {MODEL_PATH}; do not combine it with --output")
+        args.output = MODEL_PATH
+    elif args.output is None:
+        args.output = os.path.join(MODELS_DIR, f"rent_predictor_{time.strftime('%Y%m%d-%H%M%S')}.cbm")
+    elif os.path.abspath(args.output) == os.path.abspath(MODEL_PATH):
+        parser.error(f"{MODEL_PATH} is the production model; pass --replace-production to overwrite it")
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+
+    start = time.perf_counter()
+    train, valid, from_cache, key_dir = load_pools(args.data, args.cache_dir, args.border_count, args.valid_fraction,
+                                          args.seed, args.rebuild)
+    pools_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = train_model(train, valid, {"iterations": args.iterations, "depth": args.depth,
+                                       "learning_rate": args.learning_rate}, args.threads, args.early_stopping, args.seed)
+    train_seconds = time.perf_counter() - start
+    model.save_model(args.output)
+    # calibration set of the model's prediction intervals (predict.calibrated_intervals)
+    shutil.copyfile(os.path.join(key_dir, "valid.csv"), holdout_path(args.output))
+
+    print(f"pools: {'cached' if from_cache else 'built'} in {pools_seconds:.2f}s "
+          f"({train.num_row()} train / {valid.num_row()} validation rows)")
+    print(f"training: {train_seconds:.2f}s, best iteration {model.get_best_iteration()}, "
+          f"validation MAE {model.get_best_score()['validation']['MAE']:.2f}")
+    print(f"saved: {args.output} (held-out listings: {holdout_path(args.output)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+from .model_loader import load_model
+from .registry import ModelRegistry, get_registry
@@ -0,0 +1,45 @@
+# model_loader.py
+
+import os
+import pickle
+import threading
+
+# -------------------
+# Cached model loading
+# -------------------
+_models = {}
+_lock = threading.Lock()
+
+
+def _read_model(path):
+    # catboost is imported here, not at module level: the registry (and the inal-cs682 price app, which
+    # does not install catboost) imports this module without loading a CatBoost model
+    from catboost import CatBoostRegressor
+
+    if path.endswith(".pkl"):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    model = CatBoostRegressor()
+    model.load_model(path)
+    return model
+
+
+def load_model(path):
+    """
+    Loads a CatBoost model (native .cbm or pickled .pkl) once per process and returns the same
+    object on every call. The file is read again only if it changed on disk (size or mtime).
+    """
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    stamp = (stat.st_size, stat.st_mtime_ns)
+
+    cached = _models.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    with _lock:
+        # another thread may have loaded it while we were waiting for the lock
+        cached = _models.get(key)
+        if cached is None or cached[0] != stamp:
+            cached = _models[key] = (stamp, _read_model(key))
+        return cached[1]
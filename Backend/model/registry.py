@@ -0,0 +1,311 @@
+# registry.py
+
+import os
+import re
+import time
+import zlib
+import argparse
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .model_loader import _read_model
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+
+# resident models at most (least recently used ones are dropped first)
+MAX_RESIDENT = int(os.environ.get("MODEL_REGISTRY_MAX_RESIDENT", "2"))
+SHADOW_WORKERS = 2
+SHADOW_LOG_SIZE = 1000
+# shadow jobs waiting at most; beyond that, shadow scoring is skipped (counted as dropped)
+SHADOW_MAX_PENDING = int(os.environ.get("MODEL_REGISTRY_SHADOW_MAX_PENDING", "256"))
+
+# -------------------
+# Artifact discovery: (model name, family, glob relative to the repository root)
+# The version is the number at the end of the file/directory name (model-3 -> "3"), otherwise the file name.
+# -------------------
+ARTIFACT_PATTERNS = [
+    ("rent", "catboost", "Backend/katt-cs682/*.cbm"),
+    ("rent", "catboost", "Backend/katt-cs682/*.pkl"),
+    ("rent", "catboost", "Backend/katt-cs682/models/*.cbm"),
+    ("price", "keras", "Backend/inal-cs682/experiments/model-*"),
+    ("rent-sklearn", "sklearn", "archive/models/*.pkl"),
+]
+
+# version served when none is requested and no A/B split is set (otherwise: the first version found)
+DEFAULT_VERSIONS = {
+    "rent": "rent_predictor_model.cbm",
+    "price": "1",
+}
+
+
+# -------------------
+# Loaders (imports deferred: TensorFlow/joblib are only imported when such a model is loaded)
+# -------------------
+def _load_keras(path):
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
+
+
+def _load_sklearn(path):
+    import joblib
+    # arrays stored by joblib.dump are memory-mapped instead of copied into the process
+    return joblib.load(path, mmap_mode="r")
+
+
+LOADERS = {
+    "catboost": _read_model,
+    "keras": _load_keras,
+    "sklearn": _load_sklearn,
+}
+
+
+def _predict(family, model, X):
+    if family == "keras":
+        return np.asarray(model.predict(X, verbose=0)).reshape(-1)
+    return np.asarray(model.predict(X)).reshape(-1)
+
+
+class ModelArtifact:
+    """
+    One versioned model file/directory found on disk.
+    """
+
+    def __init__(self, name, version, family, path):
+        self.name = name
+        self.version = version
+        self.family = family
+        self.path = path
+
+    def size_bytes(self):
+        if os.path.isdir(self.path):
+            return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(self.path) for f in files)
+        return os.path.getsize(self.path)
+
+    def to_dict(self):
+        return {"name": self.name, "version": self.version, "family": self.family,
+                "path": os.path.relpath(self.path, REPO_DIR), "size_bytes": self.size_bytes()}
+
+
+def version_from_path(path):
+    base = os.path.basename(path.rstrip(os.sep))
+    match = re.search(r"-(\d+)$", base)
+    return match.group(1) if match else base
+
+
+def discover(root=REPO_DIR, patterns=ARTIFACT_PATTERNS):
+    """
+    Finds the model artifacts under root. Returns {name: {version: ModelArtifact}}.
+    """
+    from glob import glob
+
+    artifacts = {}
+    for name, family, pattern in patterns:
+        for path in sorted(glob(os.path.join(root, pattern))):
+            if family == "keras" and not os.path.exists(os.path.join(path, "saved_model.pb")):
+                continue
+            version = version_from_path(path)
+            artifacts.setdefault(name, {})[version] = ModelArtifact(name, version, family, path)
+    return artifacts
+
+
+# -------------------
+# Registry
+# -------------------
+class ModelRegistry:
+    """
+    Serves several models from one process: artifacts are discovered up front but only loaded on
+    first use, and at most max_resident models are kept in memory (LRU). Requests are routed by
+    model name and version, or by a weighted A/B split keyed on a request key. Shadow versions are
+    scored in background threads on the same input and logged, without adding to the latency of
+    the primary prediction; shadow failures (including a full queue) never reach the caller.
+    """
+
+    def __init__(self, artifacts=None, max_resident=MAX_RESIDENT, max_shadow_pending=SHADOW_MAX_PENDING):
+        self.artifacts = discover() if artifacts is None else artifacts
+        self.max_resident = max_resident
+        self.splits = {}
+        self.shadow_log = deque(maxlen=SHADOW_LOG_SIZE)
+        self._resident = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._shadow_pool = ThreadPoolExecutor(max_workers=SHADOW_WORKERS, thread_name_prefix="shadow")
+        self._shadow_pending = threading.BoundedSemaphore(max_shadow_pending)
+        self._shadow_sinks = []
+        self.stats = {"loads": 0, "hits": 0, "evictions": 0}
+        self.shadow_stats = {"submitted": 0, "scored": 0, "dropped": 0, "errors": 0}
+        self.load_seconds = {}
+
+    # --- Routing ---
+    def artifact(self, name, version=None):
+        versions = self.artifacts.get(name)
+        if not versions:
+            raise KeyError(f"Unknown model {name!r}; available: {sorted(self.artifacts)}")
+        version = version or DEFAULT_VERSIONS.get(name) or next(iter(versions))
+        if version not in versions:
+            raise KeyError(f"Unknown version {version!r} of {name!r}; available: {sorted(versions)}")
+        return versions[version]
+
+    def set_split(self, name, weights):
+        """
+        A/B split for name, e.g. {"1": 0.9, "3": 0.1}. Requests with the same key always get the same version.
+        """
+        for version in weights:
+            self.artifact(name, version)
+        total = float(sum(weights.values()))
+        self.splits[name] = [(version, weight / total) for version, weight in weights.items()]
+
+    def route(self, name, version=None, key=None):
+        if version is not None or name not in self.splits:
+            return self.artifact(name, version).version
+        # stable bucket in [0, 1) from the request key (random when there is none)
+        point = (zlib.crc32(str(key).encode()) % 10000) / 10000 if key is not None else np.random.random()
+        cumulative = 0.0
+        for version, weight in self.splits[name]:
+            cumulative += weight
+            if point < cumulative:
+                return version
+        return self.splits[name][-1][0]
+
+    # --- Lazy loading with an LRU bound ---
+    def get(self, name, version=None):
+        artifact = self.artifact(name, version)
+        key = (artifact.name, artifact.version)
+
+        with self._lock:
+            if key in self._resident:
+                self._resident.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._resident[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # one thread loads a given model, other models keep being served meanwhile
+        with load_lock:
+            with self._lock:
+                if key in self._resident:
+                    self._resident.move_to_end(key)
+                    return self._resident[key]
+            start = time.perf_counter()
+            model = LOADERS[artifact.family](artifact.path)
+            with self._lock:
+                self._resident[key] = model
+                self.stats["loads"] += 1
+                self.load_seconds[f"{artifact.name}:{artifact.version}"] = round(time.perf_counter() - start, 3)
+                while len(self._resident) > self.max_resident:
+                    self._resident.popitem(last=False)
+                    self.stats["evictions"] += 1
+            return model
+
+    def resident(self):
+        with self._lock:
+            return [f"{name}:{version}" for name, version in self._resident]
+
+    # --- Scoring ---
+    def predict(self, name, X, version=None, key=None, shadow=()):
+        """
+        Predicts with the routed version of name. shadow: other versions scored on the same X in the
+        background; their comparison with the primary prediction is appended to shadow_log.
+        Returns (predictions, version).
+        """
+        version = self.route(name, version, key)
+        family = self.artifact(name, version).family
+        predictions = _predict(family, self.get(name, version), X)
+
+        for shadow_version in shadow:
+            if shadow_version != version:
+                self._submit_shadow(name, version, shadow_version, X, predictions, key)
+        return predictions, version
+
+    def add_shadow_sink(self, sink):
+        """
+        sink(entry, X, primary, shadow) is called in the shadow thread after every shadow prediction,
+        e.g. to persist the paired predictions. Exceptions raised by a sink are counted as errors.
+        """
+        self._shadow_sinks.append(sink)
+
+    def _submit_shadow(self, name, version, shadow_version, X, primary, key):
+        try:
+            if not self._shadow_pending.acquire(blocking=False):
+                self.shadow_stats["dropped"] += 1
+                return
+            self.shadow_stats["submitted"] += 1
+            try:
+                self._shadow_pool.submit(self._score_shadow, name, version, shadow_version, X, primary, key,
+                                         time.time())
+            except Exception:
+                self._shadow_pending.release()
+                raise
+        except Exception as e:
+            self.shadow_stats["errors"] += 1
+            print(f"Shadow scoring failed: {str(e)}")
+
+    def _score_shadow(self, name, version, shadow_version, X, primary, key, timestamp):
+        try:
+            start = time.perf_counter()
+            try:
+                shadow = _predict(self.artifact(name, shadow_version).family, self.get(name, shadow_version), X)
+                entry = {"mean_abs_diff": float(np.mean(np.abs(shadow - primary))),
+                         "shadow_mean": float(np.mean(shadow)), "primary_mean": float(np.mean(primary))}
+            except Exception as e:
+                shadow, entry = None, {"error": str(e)}
+            entry = {"model": name, "version": version, "shadow_version": shadow_version, "key": key,
+                     "timestamp": timestamp, "rows": len(primary), "seconds": round(time.perf_counter() - start, 4),
+                     **entry}
+            self.shadow_log.append(entry)
+
+            if shadow is None:
+                self.shadow_stats["errors"] += 1
+                return
+            for sink in self._shadow_sinks:
+                sink(entry, X, primary, shadow)
+            self.shadow_stats["scored"] += 1
+        except Exception as e:
+            self.shadow_stats["errors"] += 1
+            print(f"Shadow scoring failed: {str(e)}")
+        finally:
+            self._shadow_pending.release()
+
+    def describe(self):
+        return {
+            "models": {name: [a.to_dict() for a in versions.values()] for name, versions in self.artifacts.items()},
+            "splits": {name: dict(split) for name, split in self.splits.items()},
+            "resident": self.resident(),
+            "max_resident": self.max_resident,
+            "stats": dict(self.stats),
+            "load_seconds": dict(self.load_seconds),
+            "shadow": dict(self.shadow_stats),
+        }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """
+    Process-wide registry over the artifacts found in the repository.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
+
+
+# -------------------
+# python -m model.registry: list the discovered artifacts
+# -------------------
+def main():
+    import json
+
+    parser = argparse.ArgumentParser(description="List the model artifacts found by the registry.")
+    parser.add_argument("--root", default=REPO_DIR)
+    args = parser.parse_args()
+    print(json.dumps(ModelRegistry(discover(args.root)).describe(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+from .responses import install, file_version
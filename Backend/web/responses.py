@@ -0,0 +1,121 @@
+# responses.py
+
+import os
+import gzip
+import hashlib
+import numpy as np
+import pandas as pd
+import orjson
+from flask import request
+from flask.json.provider import JSONProvider
+from werkzeug.http import unquote_etag
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+'''
+Response middleware shared by the Flask apps (inal-cs682/app.py, katt-cs682/app.py): orjson encoding,
+ETags from the model and dataset versions (304 on If-None-Match) and gzip/brotli compression of large
+JSON responses.
+'''
+
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+# --- Fast JSON (orjson; numpy scalars/arrays natively, NaN -> null) ---
+def _default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    if isinstance(obj, (pd.Timestamp, pd.Timedelta)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson: jsonify() output is built in one call, numpy floats/ints
+    (e.g. Keras or CatBoost predictions) serialize without conversion and NaN becomes null (valid JSON).
+    """
+
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=_default, option=self.options),
+                                        mimetype="application/json")
+
+
+# --- Versions for ETags ---
+def file_version(path: str) -> str:
+    # size + mtime of a file (or of every file under a directory)
+    paths = [path] if not os.path.isdir(path) else \
+        [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+    stats = [os.stat(p) for p in sorted(paths) if os.path.exists(p)]
+    return hashlib.sha1(repr([(s.st_size, s.st_mtime_ns) for s in stats]).encode()).hexdigest()[:12]
+
+
+def request_etag(version: str) -> str:
+    # weak validator: the response only depends on the model/dataset version and the request (path + query)
+    key = f"{version}|{request.method if request.method != 'HEAD' else 'GET'}|{request.full_path}"
+    return 'W/"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+# --- Middleware ---
+def install(app, version, min_bytes: int = COMPRESS_MIN_BYTES, no_etag=()):
+    """
+    orjson responses, ETags and compression for a Flask app.
+    - version(): current model + dataset version; ETags of GET requests are derived from it and the
+      request, so a matching If-None-Match is answered with 304 before the route runs
+    - no_etag: endpoints whose responses change without a version change (no ETag, no 304)
+    - JSON responses of at least min_bytes are brotli- (if installed) or gzip-compressed
+      following Accept-Encoding
+    """
+    app.json = OrjsonProvider(app)
+
+    def cacheable():
+        return request.method in ("GET", "HEAD") and request.endpoint not in no_etag
+
+    @app.before_request
+    def not_modified():
+        if cacheable() and request.if_none_match:
+            etag = request_etag(version())
+            if request.if_none_match.contains_weak(unquote_etag(etag)[0]):
+                response = app.response_class(status=304)
+                response.headers["ETag"] = etag
+                return response
+
+    @app.after_request
+    def finalize(response):
+        if response.mimetype != "application/json" or response.direct_passthrough:
+            return response
+
+        if cacheable() and response.status_code == 200:
+            response.headers["ETag"] = request_etag(version())
+            response.headers["Cache-Control"] = "no-cache"
+
+        body = response.get_data()
+        accepted = request.accept_encodings
+        if len(body) < min_bytes or "Content-Encoding" in response.headers:
+            return response
+        response.vary.add("Accept-Encoding")
+        if brotli is not None and accepted["br"]:
+            response.set_data(brotli.compress(body, quality=BROTLI_QUALITY))
+            response.headers["Content-Encoding"] = "br"
+        elif accepted["gzip"]:
+            response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+            response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    return app
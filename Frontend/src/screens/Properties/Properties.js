@@ -32,7 +32,7 @@ import PriceToggle from '../../components/PriceToggle/PriceToggle';
 import SquareFootageToggle from '../../components/SquareFootageToggle/SquareFootageToggle';
 import SortToggle from '../../components/SortToggle/SortToggle';
 import { searchProperties } from '../../services/realtyApi';
-import { searchMLSProperties } from '../../services/mlsApi';
+import { searchMLSListings } from '../../services/mlsApi';
 import { WORKING_VERSION, EDIT_VERSION } from '../../version';
 import Header from '../../components/Header';
 import DevModeWrapper from '../../components/DevToggle/DevModeWrapper';
@@ -165,7 +165,7 @@ const Properties = () => {
       setLoading(true);
       try {
         const filters = buildFilters(stateCode, cityName, formattedAddress, postalCode, price, beds, baths, sqft);
-        const searchFunction = dataSource === 'realtyApi' ? searchProperties : searchMLSProperties;
+        const searchFunction = dataSource === 'realtyApi' ? searchProperties : searchMLSListings;
         const result = await searchFunction({
           ...filters,
           sort
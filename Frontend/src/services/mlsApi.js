@@ -279,6 +279,76 @@ export const searchMLSProperties = async (query, options = {}) => {
   }
 };
 
+// Server-side search: one filtered, sorted page from GET /api/listings (no CSV download)
+export const searchMLSListings = async (filters = {}) => {
+  const params = new URLSearchParams();
+  const setParam = (name, value) => {
+    if (value !== undefined && value !== null && value !== '') params.set(name, value);
+  };
+
+  setParam('state_code', filters.state_code);
+  setParam('city', filters.city);
+  setParam('postal_code', filters.postal_code);
+  setParam('address', filters.address);
+
+  const ranges = { price: filters.list_price, beds: filters.beds, baths: filters.baths, sqft: filters.sqft };
+  Object.entries(ranges).forEach(([name, range]) => {
+    if (!range) return;
+    setParam(`min_${name}`, range.min);
+    setParam(`max_${name}`, range.max);
+  });
+
+  if (filters.sort) {
+    setParam('sort_by', 'price');
+    setParam('sort', filters.sort);
+  }
+  setParam('page', filters.page);
+  setParam('page_size', filters.page_size);
+
+  try {
+    const response = await fetch(`/api/listings?${params.toString()}`);
+    const data = await response.json();
+    if (!response.ok) {
+      throw new Error(data.error || `${response.status} ${response.statusText}`);
+    }
+
+    return {
+      success: true,
+      processedData: data.listings.map(convertToCommonFormat).filter(Boolean),
+      total: data.total,
+      page: data.page,
+      pages: data.pages
+    };
+  } catch (error) {
+    console.error('Error searching MLS listings:', error);
+    return {
+      success: false,
+      errorMessage: 'Failed to load MLS listings: ' + error.message
+    };
+  }
+};
+
+// Map viewport: listings (or clusters at low zoom) inside the bounds, from GET /api/listings/map
+export const getMLSMapListings = async ({ west, south, east, north }, zoom) => {
+  try {
+    const response = await fetch(`/api/listings/map?bbox=${west},${south},${east},${north}&zoom=${Math.round(zoom)}`);
+    const data = await response.json();
+    if (!response.ok) {
+      throw new Error(data.error || `${response.status} ${response.statusText}`);
+    }
+
+    return {
+      clustered: data.clustered,
+      total: data.total,
+      clusters: data.clusters || [],
+      properties: (data.listings || []).map(convertToCommonFormat).filter(Boolean)
+    };
+  } catch (error) {
+    console.error('Error loading map listings:', error);
+    return null;
+  }
+};
+
 // Function to get location suggestions from MLS data
 export const getMLSLocationSuggestions = async (query) => {
   if (!query || query.length < 2) return [];